@@ -1,27 +1,58 @@
 """Dashboard for PulseOx.
 """
 
+import asyncio
 from datetime import datetime, timezone
 import os
-from typing import Annotated, Literal
+from typing import (Annotated, Any, Dict, List, Literal, Optional,
+                    Sequence, Tuple)
 
 import requests
 from pydantic import BaseModel, Field, PrivateAttr
 
 from pulseox.specs import (ValidationError, GitHubAPIError,
-                           JOB_REPORT, make_dt_formatter, create_metadata,
-                           DEFAULT_BASE_URL)
+                           JOB_REPORT, JOB_REPORT_SET, make_dt_formatter,
+                           create_metadata, require_text, DEFAULT_BASE_URL)
 from pulseox.generic_backend import make_backend
+from pulseox.github_http import make_session
+
+
+def run_async(coro):
+    """Run coroutine to completion in a new event loop and return result.
+
+    Uses uvloop (install with the `fast` extra) when available since its
+    event loop has less overhead per I/O operation than the default.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+    return uvloop.run(coro)
 
 
 class PulseOxClient(BaseModel):
     """Client for posting content to repositories (GitHub or local git).
+
+    Use `post` for a single file, `post_many` to write several files in
+    one commit, and `apost` or `post_concurrently` to make several posts
+    at once (the latter runs on uvloop when it is installed).
+
+    The client keeps a pool of open connections. Use it as a context
+    manager (`with PulseOxClient(...) as client:` or `async with`) or
+    call `close` when done so the connections are closed promptly
+    instead of whenever the client is garbage collected.
     """
 
     token: Annotated[str, Field(exclude=True, default='', description=(
         'GitHub personal access token to access repo.'))]
 
-    show_tz: Annotated[str, Field(default=os.environ.get(
+    tokens: Annotated[List[str], Field(
+        exclude=True, default_factory=list, description=(
+            'Optional extra GitHub tokens. Requests rotate through token'
+            ' and these (skipping any that are rate limited) which'
+            ' multiplies the effective GitHub rate limit.'))]
+
+    show_tz: Annotated[str, Field(default_factory=lambda: os.environ.get(
         'TZ', 'US/Eastern'), description=(
         'String name of timezone to display for datetimes'))]
 
@@ -31,6 +62,36 @@ class PulseOxClient(BaseModel):
     _base_url: str = PrivateAttr(default_factory=lambda: (
         os.environ.get('DEFAULT_PULSEOX_URL', DEFAULT_BASE_URL)))
 
+    # Pooled session kept for the lifetime of the client so that the
+    # GET/PUT pair inside each post (and repeated posts) reuse the
+    # same keep-alive connection to the GitHub API. The pool blocks
+    # when full so concurrent `apost` calls share its connections
+    # rather than each opening (and discarding) a new one.
+    _session: Any = PrivateAttr(default_factory=lambda: make_session(
+        pool_block=True))
+
+    # Backends created by post, reused so that per-backend caches
+    # (e.g., ETags for file lookups) persist across posts.
+    _backends: Dict[Tuple, Any] = PrivateAttr(default_factory=dict)
+
+    def close(self) -> None:
+        """Close pooled connections (the client may still be used after).
+        """
+        self._session.close()
+        self._backends.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
     def post(
         self,
         owner: str,
@@ -63,14 +124,119 @@ class PulseOxClient(BaseModel):
         metadata = create_metadata(path_to_file, report, note, self.show_tz)
         full_content = f"{content}\n\n{metadata}"
 
-        backend = make_backend(
-            owner, repo,
-            token=self.token,
-            base_url=self._base_url,
-            git_executable=self.git_executable
-        )
+        backend = self._get_backend(owner, repo)
         return backend.update_file(path_to_file, full_content)
 
+    async def apost(
+        self,
+        owner: str,
+        repo: str,
+        path_to_file: str,
+        content: str,
+        report: Literal[JOB_REPORT] = "GOOD",
+        note: str = ""
+    ):
+        """Asynchronous version of `post`.
+
+        The post runs in a worker thread using the client's pooled
+        session, so many posts can overlap their network waits with
+        something like
+
+          await asyncio.gather(*[client.apost(...) for ...])
+
+        Avoid concurrent posts to the same local git repo since git
+        serializes access to the index.
+
+        Args and return value are the same as for `post`.
+        """
+        return await asyncio.to_thread(
+            self.post, owner, repo, path_to_file, content, report, note)
+
+    def post_many(
+        self,
+        owner: str,
+        repo: str,
+        files: List[Sequence[str]],
+        commit_message: str = 'Update files'
+    ):
+        """Post several files to a repository in a single commit.
+
+        For GitHub this takes a fixed number of API requests no matter
+        how many files are posted, while calling `post` for each file
+        takes at least one request (and commit) per file.
+
+        Args:
+            owner: Repository owner (or None for local git repos)
+            repo: Repository name (or file:// path for local git repos)
+            files: List of (path_to_file, content, report, note) tuples
+                   where report and note are optional (as in `post`).
+            commit_message: Commit message for the update
+
+        Returns:
+            Latest response from the GitHub API, or None for local git
+
+        Raises:
+            ValidationError: If parameters are invalid (including an
+                             item in files with the wrong length)
+            GitHubAPIError: If GitHub API request fails
+        """
+        if not files:
+            raise ValidationError("files list cannot be empty")
+        tree = []
+        for item in files:
+            if not 2 <= len(item) <= 4:
+                raise ValidationError(
+                    'Each item in files must be (path_to_file, content'
+                    f'[, report[, note]]), got {len(item)} values')
+            path_to_file, content, *rest = item
+            report = rest[0] if rest else 'GOOD'
+            note = rest[1] if len(rest) > 1 else ''
+            self._validate_post_params(
+                owner, repo, path_to_file, content, report)
+            metadata = create_metadata(
+                path_to_file, report, note, self.show_tz)
+            tree.append((path_to_file, f"{content}\n\n{metadata}"))
+
+        backend = self._get_backend(owner, repo)
+        return backend.write_tree(tree, commit_message)
+
+    def post_concurrently(self, posts: List[Dict[str, Any]]) -> List:
+        """Make several posts concurrently from synchronous code.
+
+        Args:
+            posts: List of dicts of keyword arguments for `post`.
+
+        Returns:
+            List of results from `post` in the same order as posts.
+
+        Raises:
+            ValidationError: If parameters are invalid
+            GitHubAPIError: If GitHub API request fails
+        """
+        async def _gather():
+            return await asyncio.gather(
+                *[self.apost(**kwargs) for kwargs in posts])
+
+        return run_async(_gather())
+
+    def _get_backend(self, owner: Optional[str], repo: str):
+        """Return (possibly cached) backend for given owner and repo.
+        """
+        key = (owner, repo, self.token, tuple(self.tokens), self._base_url,
+               self.git_executable)
+        backend = self._backends.get(key)
+        if backend is None:
+            backend = make_backend(
+                owner, repo,
+                token=self.token,
+                base_url=self._base_url,
+                git_executable=self.git_executable,
+                session=self._session,
+                tokens=self.tokens
+            )
+            self._backends[key] = backend
+        return backend
+
     def _validate_post_params(
         self,
         owner: str,
@@ -85,15 +251,12 @@ class PulseOxClient(BaseModel):
             ValidationError: If any parameter is invalid
         """
         # For local git repos, owner can be None
-        if owner is not None and (not owner or not owner.strip()):
-            raise ValidationError("owner cannot be empty string")
-        if not repo or not repo.strip():
-            raise ValidationError("repo cannot be empty")
-        if not path_to_file or not path_to_file.strip():
-            raise ValidationError("path_to_file cannot be empty")
+        require_text(owner, 'owner', allow_none=True)
+        require_text(repo, 'repo')
+        require_text(path_to_file, 'path_to_file')
         if content is None:
             raise ValidationError("content cannot be None")
-        if report not in JOB_REPORT:
+        if report not in JOB_REPORT_SET:
             raise ValidationError(
                 f"report must be one of {JOB_REPORT}, "
                 f"got: {report}"
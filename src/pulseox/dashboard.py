@@ -1,29 +1,59 @@
 """Dashboard for PulseOx.
 """
 
+import collections
 import logging as rawLogger
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, UTC
 import os
+import threading
 from typing import List, Optional, Annotated, Dict, Union, Tuple, Any
 
-import notifiers
 import requests
-from pydantic import BaseModel, Field, SkipValidation, PrivateAttr
+from pydantic import BaseModel, ConfigDict, Field, SkipValidation, PrivateAttr
 
 
-from pulseox.specs import (VALID_MODES, VALID_STATUSES, JOB_REPORT,
-                           ValidationError, GitHubAPIError, PulseOxSpec,
-                           make_dt_formatter, create_metadata,
-                           format_response_error, DEFAULT_BASE_URL)
+from pulseox.specs import (VALID_MODES, VALID_STATUSES, VALID_STATUS_SET,
+                           JOB_REPORT, ValidationError, GitHubAPIError,
+                           PulseOxSpec, make_dt_formatter, create_metadata,
+                           format_response_error, require_text,
+                           DEFAULT_BASE_URL)
 from pulseox.github import download_github_file
 from pulseox.generic_backend import make_backend
 
+try:
+    import orjson  # optional; install with the `fast` extra
+except ImportError:
+    orjson = None
+
 
 LOGGER = rawLogger.getLogger(__name__)
 
+# Section header prefix and link format for each output mode.
+_SECTION_PREFIX = {'md': '#', 'org': '*'}
+_LINK_FORMATS = {'md': '[{text}]({url})', 'org': '[[{url}][{text}]]'}
+
+# Below this many specs compute_summary looks them up serially since
+# starting a thread pool costs more than it saves.
+MIN_CONCURRENT_SPECS = 8
+
+# Recently formatted summary text keyed by everything that goes into it
+# (see PulseOxSummary._text_key). A polling dashboard usually sees the
+# same statuses cycle after cycle and formatting parses every timestamp.
+# Dashboards may be formatted from several threads, so the cache is
+# only used while holding _TEXT_CACHE_LOCK.
+_TEXT_CACHE: 'collections.OrderedDict[Tuple, str]' = (
+    collections.OrderedDict())
+_TEXT_CACHE_SIZE = 16
+_TEXT_CACHE_LOCK = threading.Lock()
+
 
 class PulseOxSpecChange(BaseModel):
 
+    # Changes are built once by compute_summary_changes and only read
+    # after that.
+    model_config = ConfigDict(frozen=True)
+
     current_item: PulseOxSpec
     current_status: str
     previous_item: Optional[PulseOxSpec] = None
@@ -48,84 +78,141 @@ class PulseOxSummary(BaseModel):
     show_tz: Annotated[str, Field(default='US/Eastern', description=(
         'String name of timezone to display for datetimes'))]
 
-    def format_text(self, change_dict, mode: str = 'md') -> str:
+    def format_text(self, change_dict, mode: str = 'md',
+                    extra_text: Optional[str] = None,
+                    metadata: Optional[str] = None) -> str:
         """Format the summary and fill the `text` field of self..
+
+        If given, extra_text is appended to the sections and then
+        metadata after a blank line (the text is joined once).
         """
-        unknown = set(VALID_STATUSES) - set(self.status)
+        if mode not in _SECTION_PREFIX:  # checked once for all sections
+            raise ValidationError(
+                f"mode must be one of {VALID_MODES}, got: {mode}")
+        unknown = VALID_STATUS_SET.difference(self.status)
         if unknown:
             raise ValueError(f'Unknown status fields: {unknown}')
-        section_info = [(n, self.status.get(n, {})) for n in VALID_STATUSES]
-        sections = [self._format_section(n, s.values(), mode)
-                    for n, s in section_info if s]
-        change_text = self.format_changes(change_dict, mode)
+        # Statuses with entries, in display order
+        active = [(name, self.status[name]) for name in VALID_STATUSES
+                  if self.status.get(name)]
+        key = self._text_key(active, change_dict, mode)
+        with _TEXT_CACHE_LOCK:
+            body = _TEXT_CACHE.get(key)
+            if body is not None:
+                _TEXT_CACHE.move_to_end(key)
+        if body is None:  # format outside the lock
+            body = self._format_body(active, change_dict, mode)
+            with _TEXT_CACHE_LOCK:
+                _TEXT_CACHE[key] = body
+                if len(_TEXT_CACHE) > _TEXT_CACHE_SIZE:
+                    _TEXT_CACHE.popitem(last=False)
+        parts = [body]
+        if extra_text:
+            parts.append(extra_text)
+        if metadata:
+            parts.extend(['\n\n', metadata])
+        self.text = ''.join(parts)
+
+    def content_key(self, change_dict, mode: str = 'md') -> Tuple:
+        """Return hashable key for the statuses and changes of a summary.
+
+        Two summaries with equal keys (and the same extra text) only
+        differ in their timestamps, such as the updated time in the
+        metadata, so one can stand in for the other.
+        """
+        return self._text_key([
+            (name, self.status[name]) for name in VALID_STATUSES
+            if self.status.get(name)], change_dict, mode)
+
+    def _format_body(self, active, change_dict, mode: str) -> str:
+        """Return text of the changes and status sections.
+        """
+        # Collect lines of all sections in one list (with a blank line
+        # between sections) so the text is built with a single join.
+        # Look up the datetime formatter once and share it across sections
+        format_dt = make_dt_formatter(self.show_tz)
+        lines = []
+        change_text = self.format_changes(change_dict, mode,
+                                          format_dt=format_dt)
         if change_text:
-            sections.insert(0, change_text)
+            lines.extend([change_text, ''])
+        for name, entries in active:
+            lines.extend(self._format_section(
+                name, entries.values(), mode, format_dt))
+            lines.append('')
+
+        return '\n'.join(lines[:-1])
 
-        self.text = '\n\n'.join(sections)
+    def _text_key(self, active, change_dict, mode: str) -> Tuple:
+        """Return hashable key for everything _format_body uses.
+        """
+        return (mode, self.show_tz, tuple(
+            (name, tuple((e.path, e.note, str(e.updated))
+                         for e in entries.values()))
+            for name, entries in active
+        ), tuple(
+            (path, c.previous_status, c.current_status,
+             str(c.current_item.updated))
+            for idict in (change_dict or {}).values()
+            for path, c in idict.items()
+            if c.current_status != c.previous_status))
 
     def format_changes(self, change_dict, mode='md', project_root='',
-                       title='Changes'):
+                       title='Changes', format_dt=None):
         if not change_dict:
             return None
 
-        lines = []
-        format_dt = make_dt_formatter(self.show_tz)
-        for _stat, idict in change_dict.items():
-            for path, change in idict.items():
-                if change.current_status != change.previous_status:
-                    lines.append(self._format_entry(
-                        path, (f'{change.previous_status}'
-                               f' --> {change.current_status}'),
-                        format_dt(change.current_item.updated), mode,
-                        project_root=project_root))
+        format_dt = format_dt or make_dt_formatter(self.show_tz)
+        format_entry = self._entry_formatter(mode, project_root)
+        lines = [format_entry(path, (f'{change.previous_status}'
+                                     f' --> {change.current_status}'),
+                              format_dt(change.current_item.updated))
+                 for idict in change_dict.values()
+                 for path, change in idict.items()
+                 if change.current_status != change.previous_status]
 
         if not lines:
             return None
 
-        if mode == 'md':
-            header = [f'# {title}', '']
-        elif mode == 'org':
-            header = [f'* {title}', '']
-        else:
+        prefix = _SECTION_PREFIX.get(mode)
+        if prefix is None:
             raise ValueError(f'Invalid {mode=}')
 
-        return "\n".join(header + lines)
+        return "\n".join([f'{prefix} {title}', ''] + lines)
 
     def _format_section(
         self,
         title: str,
         entries: List[dict],
-        mode: str
-    ) -> str:
+        mode: str,
+        format_dt=None
+    ) -> List[str]:
         """Format a single section of the summary.
 
         Args:
             title: Section title
             entries: List of entries for this section
             mode: Output format
+            format_dt: Optional datetime formatter from make_dt_formatter
+                       (looked up from self.show_tz if not given)
 
         Returns:
-            Formatted section string
+            List of lines for the section (to join with newlines)
         """
-        if mode == 'md':
-            header = f"# {title}"
-        elif mode == 'org':
-            header = f"* {title}"
-        else:
+        if not entries:
+            return []
+        prefix = _SECTION_PREFIX.get(mode)
+        if prefix is None:
             # Should not happen if mode is validated
             raise ValidationError(
                 f"Invalid mode in _format_section: {mode}"
             )
 
-        lines = [header, ""]
-
-        format_dt = make_dt_formatter(self.show_tz)
-        for entry in entries:
-            lines.append(self._format_entry(entry.path, entry.note,
-                                            format_dt(entry.updated),
-                                            mode))
-
-        return "\n".join(lines)
+        format_dt = format_dt or make_dt_formatter(self.show_tz)
+        format_entry = self._entry_formatter(mode)
+        return [f"{prefix} {title}", ""] + [
+            format_entry(entry.path, entry.note, format_dt(entry.updated))
+            for entry in entries]
 
     @classmethod
     def _format_entry(cls, path, note, updated, mode: str,
@@ -139,24 +226,54 @@ class PulseOxSummary(BaseModel):
         Returns:
             Formatted entry string
         """
-        link = cls.format_link(path, project_root+path, mode)
+        return cls._entry_formatter(mode, project_root)(path, note, updated)
 
-        parts = [f"- {link}"]
-        if note:
-            parts.append(note)
-        parts.append(updated)
+    @staticmethod
+    def _entry_formatter(mode: str, project_root: str = ''):
+        """Return a function formatting entries for the given mode.
+
+        The mode is checked and the format string built once here so
+        formatting many entries does not repeat that work per entry.
+        The project_root is baked into the format string as well (the
+        link url is project_root followed by the path).
+
+        Returns:
+            Function taking (path, note, updated) and returning the
+            formatted entry string.
+        """
+        link = _LINK_FORMATS.get(mode)
+        if link is None:
+            raise ValidationError(f"Invalid mode in format_link: {mode}")
+        link = link.replace('{url}', project_root.replace(
+            '{', '{{').replace('}', '}}') + '{text}')
+        with_note = ('- ' + link + ' {note} {updated}').format
+        without_note = ('- ' + link + ' {updated}').format
 
-        return " ".join(parts)
+        def format_entry(path, note, updated):
+            if note:
+                return with_note(text=path, note=note, updated=updated)
+            return without_note(text=path, updated=updated)
+        return format_entry
 
     @staticmethod
     def format_link(text, url, mode='md'):
-        if mode == 'md':
-            link = f"[{text}]({url})"
-        elif mode == 'org':
-            link = f"[[{url}][{text}]]"
-        else:
+        link = _LINK_FORMATS.get(mode)
+        if link is None:
             raise ValidationError(f"Invalid mode in format_link: {mode}")
-        return link
+        return link.format(text=text, url=url)
+
+
+class _SavedDashboardData(BaseModel):
+    """Parts of a saved dashboard restored by get_remote_data.
+
+    Loading saved JSON into this instead of PulseOxDashboard skips
+    validating the changes field (two specs per change) which
+    get_remote_data does not use. Extra fields are ignored.
+    """
+
+    spec_list: Optional[List[PulseOxSpec]] = None
+    summary: Optional[PulseOxSummary] = None
+    previous_summary: Optional[PulseOxSummary] = None
 
 
 class PulseOxDashboard(BaseModel):
@@ -197,9 +314,36 @@ class PulseOxDashboard(BaseModel):
             'Dictionary where keys are providers and values are'
             ' dictionaries of keyword args for that notifier.'))]
 
+    max_workers: Annotated[int, Field(exclude=True, default=10, ge=1,
+                                      description=(
+        'Maximum number of specs to look up concurrently in'
+        ' compute_summary.'))]
+
+    use_graphql: Annotated[bool, Field(exclude=True, default=False,
+                                       description=(
+        'If True, compute_summary reads the files of many specs per'
+        ' GraphQL query (see PulseOxSpec.update_many) instead of one'
+        ' request per spec.'))]
+
+    session: Annotated[Any, Field(default=None, exclude=True, description=(
+        'Optional requests.Session used for all GitHub calls made by'
+        ' the dashboard (default: the shared pulseox session).'))]
+
     _base_url: str = PrivateAttr(default_factory=lambda: (
         os.environ.get('DEFAULT_PULSEOX_URL', DEFAULT_BASE_URL)))
 
+    # Backend reused across write_summary calls so it can keep its
+    # cached branch ref and commit lookups between writes.
+    _backend: Any = PrivateAttr(default=None)
+
+    # Paths and entries of the last summary written (see write_summary)
+    _last_written: Optional[Tuple] = PrivateAttr(default=None)
+    # Key of the summary from compute_summary (see write_summary)
+    _summary_key: Optional[Tuple] = PrivateAttr(default=None)
+
+    # Notifier instances by provider name (see maybe_notify_changes)
+    _notifiers: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
     _latest_response: Annotated[
         Optional[SkipValidation[requests.Response]], Field(
             description=('Latest response object from interacting with'
@@ -233,9 +377,10 @@ class PulseOxDashboard(BaseModel):
         """
         content = download_github_file(self.token, self.owner,
                                        self.repo, github_file, ref,
-                                       base_url=self._base_url)
-        content = content.decode('utf8')
-        parsed = self.__class__.model_validate_json(content)
+                                       base_url=self._base_url,
+                                       session=self.session)
+        # pydantic parses the bytes directly so no need to decode first
+        parsed = _SavedDashboardData.model_validate_json(content)
         self.spec_list = parsed.spec_list
         self.summary = parsed.summary
         self.previous_summary = parsed.previous_summary
@@ -258,10 +403,8 @@ class PulseOxDashboard(BaseModel):
             ValidationError: If parameters are invalid
         """
         # For local git repos, owner can be None
-        if self.owner is not None and (not self.owner or not self.owner.strip()):
-            raise ValidationError("owner cannot be empty string")
-        if not self.repo or not self.repo.strip():
-            raise ValidationError("repo cannot be empty")
+        require_text(self.owner, 'owner', allow_none=True)
+        require_text(self.repo, 'repo')
         if mode not in VALID_MODES:
             raise ValidationError(
                 f"mode must be one of {VALID_MODES}, got: {mode}"
@@ -272,33 +415,68 @@ class PulseOxDashboard(BaseModel):
         if not self.spec_list or not isinstance(self.spec_list, list):
             raise ValidationError("spec_list must be non-empty list")
 
-        status = {n: {} for n in VALID_STATUSES}
+        now = datetime.now(UTC)  # judge every spec at the same time
+
+        def update_and_classify(spec):
+            spec.update(token=self.token, base_url=self._base_url,
+                        session=self.session)
+            return self._classify_spec(spec, now)
+
+        # Each lookup is a network round trip (or git call) and each spec
+        # only updates itself, so do the lookups concurrently. Workers
+        # also classify their spec so that CPU work overlaps the I/O of
+        # lookups still in flight; map keeps results in spec_list order.
+        if self.use_graphql:
+            # Read files of many specs per request (see update_many)
+            PulseOxSpec.update_many(self.spec_list, token=self.token,
+                                    base_url=self._base_url,
+                                    session=self.session, use_graphql=True,
+                                    max_workers=self.max_workers)
+            sections = [self._classify_spec(s, now) for s in self.spec_list]
+        elif len(self.spec_list) < MIN_CONCURRENT_SPECS:
+            sections = [update_and_classify(s) for s in self.spec_list]
+        else:
+            with ThreadPoolExecutor(max_workers=min(
+                    self.max_workers, len(self.spec_list))) as pool:
+                sections = list(pool.map(update_and_classify,
+                                         self.spec_list))
 
-        for spec in self.spec_list:
-            spec.update(token=self.token, base_url=self._base_url)
-            if spec.report == 'BAD':
-                status['ERROR'][spec.path] = spec
-            else:
-                if spec.is_within_schedule():
-                    if spec.report == 'GOOD':  # within schedule and GOOD
-                        status['OK'][spec.path] = spec
-                    # NOTE: within schedule but NOT_REPORTED falls
-                    # through and appears in no section (see issue
-                    # discussed with maintainer).
-                else:  # not within schedule (and not ERROR)
-                    status['MISSING'][spec.path] = spec
+        status = {n: {} for n in VALID_STATUSES}
+        for spec, section in zip(self.spec_list, sections):
+            if section:
+                status[section][spec.path] = spec
 
         self.previous_summary = self.summary
-        self.summary = PulseOxSummary(status=status)
+        # status only holds our already validated specs
+        self.summary = PulseOxSummary.model_construct(status=status)
         self.changes = self.compute_summary_changes(
             self.previous_summary, self.summary)
-        self.summary.format_text(change_dict=self.changes)
-        if extra_text:
-            self.summary.text += extra_text
-        self.summary.text += '\n\n' + create_metadata(
-            '.' + mode, show_tz=show_tz)
+        self.summary.format_text(
+            change_dict=self.changes, extra_text=extra_text,
+            metadata=create_metadata('.' + mode, show_tz=show_tz))
+        self._summary_key = (self.summary.content_key(self.changes, mode),
+                             extra_text)
         return self
 
+    @staticmethod
+    def _classify_spec(spec: PulseOxSpec,
+                       now: Optional[datetime] = None) -> Optional[str]:
+        """Return the status section spec belongs in (or None for no section).
+
+        If given, now is the current time to check the schedule against.
+        """
+        report = spec.report
+        if report == 'BAD':
+            return 'ERROR'
+        if spec.is_within_schedule(now=now):
+            if report == 'GOOD':  # within schedule and GOOD
+                return 'OK'
+            # NOTE: within schedule but NOT_REPORTED falls
+            # through and appears in no section (see issue
+            # discussed with maintainer).
+            return None
+        return 'MISSING'  # not within schedule (and not ERROR)
+
     def maybe_notify_changes(self, title=None, project_root=''):
         title = title or f'Changes for {self.owner}/{self.repo}'
         if not self.notify:
@@ -308,7 +486,13 @@ class PulseOxDashboard(BaseModel):
         if not change_text:
             return
         for provider, kwargs in self.notify.items():
-            my_notifier = notifiers.get_notifier(provider)
+            my_notifier = self._notifiers.get(provider)
+            if my_notifier is None:
+                # Imported here since notifiers is slow to import and
+                # most dashboards never send notifications.
+                import notifiers
+                my_notifier = notifiers.get_notifier(provider)
+                self._notifiers[provider] = my_notifier
             my_notifier.notify(message=change_text, **kwargs)
 
     @staticmethod
@@ -342,8 +526,7 @@ class PulseOxDashboard(BaseModel):
         if not new_summary:
             raise ValueError('Must provide non-empty new_summary')
 
-        prev_stat = {item.path: {'previous_status': p_stat,
-                                 'previous_item': item}
+        prev_stat = {item.path: (p_stat, item)
                      for p_stat, idict in previous_summary_status.items()
                      for item in idict.values()}
         change_dict = {}
@@ -351,17 +534,46 @@ class PulseOxDashboard(BaseModel):
             sdict = {}
             change_dict[stat] = sdict
             for item in idict.values():
-                prev_info = prev_stat.get(item.path, {})
-                change = PulseOxSpecChange(current_item=item,
-                                           current_status=stat, **prev_info)
-                sdict[item.path] = change
+                prev = prev_stat.get(item.path)
+                # Items come from validated summaries so skip validation
+                sdict[item.path] = PulseOxSpecChange.model_construct(
+                    current_item=item, current_status=stat,
+                    previous_status=prev[0] if prev else None,
+                    previous_item=prev[1] if prev else None)
 
         return change_dict
 
+    def _get_backend(self):
+        """Return the backend for our repo, creating it on first use.
+        """
+        key = (self.owner, self.repo, self.token, self._base_url)
+        if self._backend is None or self._backend[0] != key:
+            self._backend = (key, make_backend(
+                self.owner, self.repo,
+                token=self.token,
+                base_url=self._base_url,
+                session=self.session
+            ))
+        return self._backend[1]
+
+    def dump_json(self) -> bytes:
+        """Serialize dashboard to indented JSON for writing to the repo.
+
+        Uses orjson when installed (which is much faster than pydantic's
+        serializer for large dashboards). Otherwise calls the pydantic
+        serializer directly since model_dump_json would decode its bytes
+        to a str which we would only encode again for upload.
+        """
+        if orjson is not None:
+            return orjson.dumps(self.model_dump(mode='json'),
+                                option=orjson.OPT_INDENT_2)
+        return self.__pydantic_serializer__.to_json(self, indent=2)
+
     def write_summary(self, path_to_summary: str = 'summary.md',
                       path_to_summary_json: Optional[str] = None,
                       force_refresh=False,
-                      allow_notify_change=True):
+                      allow_notify_change=True,
+                      skip_unchanged=False):
         """Write summary to a file in GitHub repository.
 
         Args:
@@ -369,6 +581,16 @@ class PulseOxDashboard(BaseModel):
             path_to_summary_json: Optional path to where to write a JSON
                                   version of the summary. If not provided
                                   we use `path_to_summary + '.json'`.
+            skip_unchanged: If True, force_refresh is False and the
+                            statuses, changes and extra text of the
+                            summary from compute_summary (see
+                            PulseOxSummary.content_key) are
+                            the same as the last summary this dashboard
+                            wrote to the same paths, skip serializing and
+                            writing and set _latest_response to None.
+                            This saves API quota on quiet polls where only
+                            the timestamps in the summary would change
+                            (so the files are never byte for byte equal).
 
         Returns:
             A copy of self to help in chaining. See the _latest_response
@@ -383,22 +605,26 @@ class PulseOxDashboard(BaseModel):
             self.compute_summary()
         if not self.summary:
             raise ValidationError("unable to generate summary")
-        if not path_to_summary or not path_to_summary.strip():
-            raise ValidationError("path_to_summary cannot be empty")
+        require_text(path_to_summary, 'path_to_summary')
         if not path_to_summary_json:
             path_to_summary_json = path_to_summary + '.json'
+        written = None if self._summary_key is None else (
+            path_to_summary, path_to_summary_json, self._summary_key)
+        if (skip_unchanged and not force_refresh and written is not None
+                and written == self._last_written):
+            LOGGER.debug('Skipping write of unchanged summary %s',
+                         path_to_summary)
+            self._latest_response = None
+            return self
         files = [
-            (path_to_summary_json, self.model_dump_json(indent=2)),
+            (path_to_summary_json, self.dump_json()),
             (path_to_summary, self.summary.text)
         ]
 
-        backend = make_backend(
-            self.owner, self.repo,
-            token=self.token,
-            base_url=self._base_url
-        )
+        backend = self._get_backend()
         backend.write_tree(files, 'Update summary files')
         self._latest_response = backend.get_latest_response()
+        self._last_written = written
 
         mode = path_to_summary.split('.')[-1]
         project_root = backend.get_project_root(path_to_summary)
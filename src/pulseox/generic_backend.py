@@ -5,18 +5,24 @@ and local git repositories, abstracting away the differences between
 the two backends.
 """
 
-from typing import Optional, List, Tuple, Annotated
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, List, Literal, Tuple, Union, Annotated
 from pydantic import BaseModel, Field
 
-from pulseox.github import GitHubBackend
-from pulseox.git import GitBackend
+from pulseox.github import (GitHubBackend, MAX_SPEC_WORKERS,
+                            update_github_spec)
+from pulseox.git import GitBackend, update_git_spec
 
 
-class GenericBackend(BaseModel):
+class GenericBackend(BaseModel, ABC):
     """Generic backend that wraps either GitHub or Git backend.
 
     This class provides a unified interface for operations that works
-    with both GitHub and local git repositories.
+    with both GitHub and local git repositories. Use make_backend to
+    create the right subclass (GitGenericBackend or GitHubGenericBackend)
+    so that each call goes straight to its backend; GenericBackend itself
+    is abstract and cannot be constructed directly.
 
     Args:
         owner: Repository owner (None for local git repos)
@@ -26,6 +32,8 @@ class GenericBackend(BaseModel):
         base_url: GitHub API base URL (for GitHub backend)
         git_executable: Path to git executable (for git backend)
         auto_push: Whether to auto-push commits (for git backend)
+        session: Optional requests.Session (for GitHub backend)
+        tokens: Optional extra tokens to rotate through (for GitHub backend)
     """
 
     owner: Optional[str]
@@ -44,25 +52,18 @@ class GenericBackend(BaseModel):
     auto_push: Annotated[bool, Field(default=True,
                                     description='Auto-push for git backend')]
 
-    _backend: Optional[object] = None
+    session: Annotated[Any, Field(default=None, exclude=True, description=(
+        'Optional requests.Session to reuse (for GitHub backend)'))]
 
-    def model_post_init(self, __context):
-        """Initialize the appropriate backend after model initialization."""
-        if self.backend_type == 'git':
-            repo_path = self.repo[7:]  # Remove 'file://' prefix
-            self._backend = GitBackend(
-                repo_path=repo_path,
-                git_executable=self.git_executable,
-                auto_push=self.auto_push
-            )
-        elif self.backend_type == 'github':
-            self._backend = GitHubBackend(
-                token=self.token,
-                base_url=self.base_url
-            )
-        else:
-            raise ValueError(f"Invalid backend_type: {self.backend_type}")
+    tokens: Annotated[List[str], Field(
+        exclude=True, default_factory=list, description=(
+            'Extra GitHub tokens used round-robin with token'
+            ' (for GitHub backend)'))]
 
+    _backend: Optional[object] = None
+    _project_root: str = ''  # set by subclasses in model_post_init
+
+    @abstractmethod
     def update_file(self, path: str, content: str, commit_message: Optional[str] = None):
         """Update or create a file in the repository.
 
@@ -74,44 +75,27 @@ class GenericBackend(BaseModel):
         Returns:
             Response object from GitHub API, or None for git backend
         """
-        if self.backend_type == 'git':
-            self._backend.update_file(path, content, commit_message)
-            return None
-        else:  # github
-            return self._backend.update_file(self.owner, self.repo, path, content)
 
-    def write_tree(self, files: List[Tuple[str, str]], commit_message: str = 'Update files'):
+    @abstractmethod
+    def write_tree(self, files: List[Tuple[str, Union[str, bytes]]],
+                   commit_message: str = 'Update files'):
         """Write multiple files to the repository in a single commit.
 
         Args:
-            files: List of (path, content) tuples
+            files: List of (path, content) tuples (content is text or bytes)
             commit_message: Commit message for the update
 
         Returns:
             None for git backend, or the latest response from GitHub backend
         """
-        if self.backend_type == 'git':
-            self._backend.write_tree(files, commit_message)
-            return None
-        else:  # github
-            self._backend.write_github_tree(
-                self.owner, self.repo, files, commit_message
-            )
-            return self._backend._latest_response
 
+    @abstractmethod
     def update_spec(self, spec):
         """Update a PulseOxSpec by querying the backend.
 
         Args:
             spec: PulseOxSpec instance to update
         """
-        if self.backend_type == 'git':
-            from pulseox.git import update_git_spec
-            repo_path = self.repo[7:]  # Remove 'file://' prefix
-            update_git_spec(spec, repo_path=repo_path, git_executable=self.git_executable)
-        else:  # github
-            from pulseox.github import update_github_spec
-            update_github_spec(spec, token=self.token, base_url=self.base_url)
 
     def get_project_root(self, path_to_summary: str = 'summary.md') -> str:
         """Get the project root URL/path for creating links.
@@ -122,11 +106,11 @@ class GenericBackend(BaseModel):
         Returns:
             URL or file path prefix for creating links
         """
-        if self.backend_type == 'git':
-            repo_path = self.repo[7:]  # Remove 'file://' prefix
-            return f'file://{repo_path}/'
-        else:  # github
-            return f'https://github.com/{self.owner}/{self.repo}/blob/main/'
+        return self._project_root
+
+    @abstractmethod
+    def _link_text(self) -> str:
+        """Return text used for links to the repository."""
 
     def format_summary_link(self, path_to_summary: str, mode: str = 'md'):
         """Format a link to the summary file.
@@ -140,15 +124,8 @@ class GenericBackend(BaseModel):
         """
         from pulseox.specs import ValidationError
 
-        project_root = self.get_project_root(path_to_summary)
-
-        if self.backend_type == 'git':
-            repo_path = self.repo[7:]  # Remove 'file://' prefix
-            text = repo_path
-        else:  # github
-            text = f'{self.owner}/{self.repo}'
-
-        url = project_root + path_to_summary
+        text = self._link_text()
+        url = self.get_project_root(path_to_summary) + path_to_summary
 
         if mode == 'md':
             return f"[{text}]({url})"
@@ -163,18 +140,91 @@ class GenericBackend(BaseModel):
         Returns:
             Response object for GitHub backend, None for git backend
         """
-        if self.backend_type == 'github':
-            return self._backend._latest_response
         return None
 
 
+class GitGenericBackend(GenericBackend):
+    """GenericBackend for a local git repository (repo is a file:// URL).
+    """
+
+    backend_type: Annotated[Literal['git'], Field(
+        default='git', description="Backend type: always 'git'")]
+
+    _repo_path: str = ''
+
+    def model_post_init(self, __context):
+        """Create the git backend for the repository path."""
+        self._repo_path = self.repo[7:]  # Remove 'file://' prefix
+        self._project_root = f'file://{self._repo_path}/'
+        self._backend = GitBackend(
+            repo_path=self._repo_path,
+            git_executable=self.git_executable,
+            auto_push=self.auto_push
+        )
+
+    def update_file(self, path: str, content: str, commit_message: Optional[str] = None):
+        self._backend.update_file(path, content, commit_message)
+
+    def write_tree(self, files: List[Tuple[str, Union[str, bytes]]],
+                   commit_message: str = 'Update files'):
+        self._backend.write_tree(files, commit_message)
+
+    def update_spec(self, spec):
+        update_git_spec(spec, repo_path=self._repo_path,
+                        git_executable=self.git_executable)
+
+    def _link_text(self) -> str:
+        return self._repo_path
+
+
+class GitHubGenericBackend(GenericBackend):
+    """GenericBackend for a repository on GitHub.
+    """
+
+    backend_type: Annotated[Literal['github'], Field(
+        default='github', description="Backend type: always 'github'")]
+
+    def model_post_init(self, __context):
+        """Create the GitHub backend."""
+        self._project_root = (
+            f'https://github.com/{self.owner}/{self.repo}/blob/main/')
+        self._backend = GitHubBackend(
+            token=self.token,
+            base_url=self.base_url,
+            session=self.session,
+            tokens=self.tokens
+        )
+
+    def update_file(self, path: str, content: str, commit_message: Optional[str] = None):
+        return self._backend.update_file(self.owner, self.repo, path, content)
+
+    def write_tree(self, files: List[Tuple[str, Union[str, bytes]]],
+                   commit_message: str = 'Update files'):
+        self._backend.write_github_tree(
+            self.owner, self.repo, files, commit_message
+        )
+        return self._backend.get_latest_response()
+
+    def update_spec(self, spec):
+        update_github_spec(spec, token=self.token, base_url=self.base_url,
+                           session=self.session)
+
+    def _link_text(self) -> str:
+        return f'{self.owner}/{self.repo}'
+
+    def get_latest_response(self):
+        return self._backend.get_latest_response()
+
+
 def make_backend(
     owner: Optional[str],
     repo: str,
     token: str = '',
     base_url: str = "https://api.github.com",
     git_executable: str = '/usr/bin/git',
-    auto_push: bool = True
+    auto_push: bool = True,
+    session: Optional[Any] = None,
+    tokens: Optional[List[str]] = None
 ) -> GenericBackend:
     """Factory function to create the appropriate backend.
 
@@ -185,22 +235,70 @@ def make_backend(
         base_url: GitHub API base URL (for GitHub backend)
         git_executable: Path to git executable (for git backend)
         auto_push: Whether to auto-push commits (for git backend)
+        session: Optional requests.Session to reuse (for GitHub backend)
+        tokens: Optional extra tokens to rotate through (for GitHub backend)
 
     Returns:
         GenericBackend instance configured with the appropriate backend
     """
     # Determine backend type based on owner and repo
     if owner is None and repo.startswith('file://'):
-        backend_type = 'git'
+        backend_cls = GitGenericBackend
     else:
-        backend_type = 'github'
+        backend_cls = GitHubGenericBackend
 
-    return GenericBackend(
+    return backend_cls(
         owner=owner,
         repo=repo,
-        backend_type=backend_type,
         token=token,
         base_url=base_url,
         git_executable=git_executable,
-        auto_push=auto_push
+        auto_push=auto_push,
+        session=session,
+        tokens=tokens or []
     )
+
+
+def update_many_specs(
+    specs: list,
+    token: Optional[str] = None,
+    base_url: str = "https://api.github.com",
+    git_executable: str = '/usr/bin/git',
+    session: Optional[Any] = None,
+    use_graphql: bool = True,
+    max_workers: Optional[int] = None
+) -> None:
+    """Update reports for many specs, batching GitHub lookups.
+
+    This is the implementation of PulseOxSpec.update_many (see there
+    for details). Specs for local git repos are updated in threads and
+    specs on GitHub go through one GitHubBackend.update_specs call.
+
+    Args:
+        specs: PulseOxSpec instances to update
+        token: GitHub personal access token (required for GitHub specs)
+        base_url: GitHub API base URL
+        git_executable: Path to git executable (for local git backend)
+        session: Optional requests.Session to reuse (for GitHub backend)
+        use_graphql: Whether to batch GitHub lookups with GraphQL
+        max_workers: Maximum number of lookups to run at once
+                     (default: pulseox.github.MAX_SPEC_WORKERS)
+    """
+    max_workers = max_workers or MAX_SPEC_WORKERS
+    github_specs, git_specs = [], []
+    for spec in specs:
+        if spec.owner is None and spec.repo.startswith('file://'):
+            git_specs.append(spec)
+        else:
+            github_specs.append(spec)
+    if len(git_specs) > 1:
+        with ThreadPoolExecutor(max_workers=min(
+                max_workers, len(git_specs))) as pool:
+            list(pool.map(lambda spec: spec.update(
+                git_executable=git_executable), git_specs))
+    elif git_specs:
+        git_specs[0].update(git_executable=git_executable)
+    if github_specs:
+        GitHubBackend(token=token or '', base_url=base_url,
+                      session=session, use_graphql=use_graphql
+                      ).update_specs(github_specs, max_workers=max_workers)
@@ -7,15 +7,21 @@ as an alternative to GitHub.
 import logging
 import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Tuple, Annotated
+from typing import (ClassVar, Dict, Optional, List, Set, Tuple, Union,
+                    Annotated)
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 
 LOGGER = logging.getLogger(__name__)
 
+# Default for apply_updates; git mostly waits on disk and network so a
+# thread per repository is enough.
+MAX_REPO_WORKERS = 8
+
 
 class GitBackend(BaseModel):
     """Backend for local git repository operations.
@@ -39,6 +45,24 @@ class GitBackend(BaseModel):
         default=True,
         description='Whether to automatically push after commits')]
 
+    # (git_executable, repo_path) pairs already checked by model_post_init
+    # so creating many backends for one repo (e.g., one per spec) only
+    # checks the filesystem once.
+    _validated_paths: ClassVar[Set[Tuple[str, str]]] = set()
+
+    # Maps each path looked up to the time of the latest commit touching
+    # it (None if none does; see _build_mtime_cache) as of the HEAD
+    # commit in _mtime_head. Cleared when HEAD moves (our own commits,
+    # pulls or other processes).
+    _mtime_cache: Dict[str, Optional[datetime]] = PrivateAttr(
+        default_factory=dict)
+    _mtime_head: Optional[str] = PrivateAttr(default=None)
+
+    # Path(repo_path) made once in model_post_init, and whether the repo
+    # has remote refs (checked on the first push from update_file).
+    _repo_dir: Optional[Path] = PrivateAttr(default=None)
+    _has_remotes: Optional[bool] = PrivateAttr(default=None)
+
     @field_validator('repo_path')
     @classmethod
     def validate_repo_path(cls, v):
@@ -50,8 +74,13 @@ class GitBackend(BaseModel):
 
     def model_post_init(self, __context):
         """Validate repo after initialization."""
+        self._repo_dir = Path(self.repo_path)
+        key = (self.git_executable, self.repo_path)
+        if key in self._validated_paths:
+            return
         self._check_repo()
         self._check_git_executable()
+        self._validated_paths.add(key)
 
     def _check_git_executable(self):
         """Check that git executable exists and is executable.
@@ -73,7 +102,7 @@ class GitBackend(BaseModel):
         Raises:
             ValueError: If repo_path is not a valid git repository
         """
-        repo_path = Path(self.repo_path)
+        repo_path = self._repo_dir
         if not repo_path.exists():
             raise ValueError(f"Repository path does not exist: {self.repo_path}")
 
@@ -82,7 +111,8 @@ class GitBackend(BaseModel):
             raise ValueError(
                 f"Not a git repository (no .git directory): {self.repo_path}")
 
-    def _run_git(self, *args, check=True, capture_output=True, text=True):
+    def _run_git(self, *args, check=True, capture_output=True, text=True,
+                 input=None):
         """Run a git command in the repository.
 
         Args:
@@ -90,6 +120,7 @@ class GitBackend(BaseModel):
             check: Whether to check return code
             capture_output: Whether to capture stdout/stderr
             text: Whether to decode output as text
+            input: Optional data to send to the command's stdin
 
         Returns:
             subprocess.CompletedProcess result
@@ -106,7 +137,8 @@ class GitBackend(BaseModel):
                 cwd=self.repo_path,
                 check=check,
                 capture_output=capture_output,
-                text=text
+                text=text,
+                input=input
             )
             return result
         except subprocess.CalledProcessError as e:
@@ -134,37 +166,79 @@ class GitBackend(BaseModel):
         """
         from pulseox.specs import ValidationError
 
-        file_path = Path(self.repo_path) / path
-        if not file_path.exists():
-            raise FileNotFoundError(f"File not found: {path}")
-
-        try:
-            return file_path.read_text()
+        file_path = self._repo_dir / path
+        try:  # opening reports a missing file (no separate exists check)
+            return file_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {path}") from None
         except Exception as e:
             raise ValidationError(f"Failed to read file {path}: {e}") from e
 
+    def _build_mtime_cache(self, paths: List[str]
+                           ) -> Dict[str, Optional[datetime]]:
+        """Map each of paths to the time of the latest commit touching it.
+
+        This takes one `git log` walk limited to paths instead of one
+        `git log` per path. Paths not in the history of HEAD map to None.
+        If git log fails, an empty dict is returned so nothing is cached.
+        """
+        from pulseox.specs import ValidationError
+
+        marker = '__COMMIT__'
+        cache = dict.fromkeys(paths)
+        try:
+            result = self._run_git(
+                '--literal-pathspecs', '-c', 'core.quotePath=false', 'log',
+                '--name-only', f'--format={marker}%aI', 'HEAD', '--', *paths)
+        except ValidationError as e:  # _run_git's CalledProcessError
+            LOGGER.warning('Failed to read git log for %d paths: %s',
+                           len(paths), e)
+            return {}
+        when = None
+        for line in result.stdout.splitlines():
+            if line.startswith(marker):
+                when = datetime.fromisoformat(line[len(marker):])
+            elif line in cache and cache[line] is None:
+                cache[line] = when  # newest commit comes first
+        return cache
+
+    def get_file_mtimes(self, paths: List[str]
+                        ) -> Dict[str, Optional[datetime]]:
+        """Get the last modification times of files from git log.
+
+        Times are cached until HEAD changes and paths not yet cached are
+        looked up together with one `git log` (see _build_mtime_cache).
+
+        Args:
+            paths: Paths to files relative to repo root
+
+        Returns:
+            Dict mapping each path to the datetime of its last
+            modification, or None if the file is not in git history
+        """
+        head = self._run_git('rev-parse', '-q', '--verify', 'HEAD',
+                             check=False).stdout.strip()
+        if head != self._mtime_head:
+            self._mtime_cache = {}
+            self._mtime_head = head
+        missing = [p for p in dict.fromkeys(paths)
+                   if p not in self._mtime_cache]
+        if missing:
+            self._mtime_cache.update(self._build_mtime_cache(missing))
+        return {path: self._mtime_cache.get(path) for path in paths}
+
     def get_file_mtime(self, path: str) -> Optional[datetime]:
         """Get the last modification time of a file from git log.
 
+        See get_file_mtimes to look up many files at once.
+
         Args:
             path: Path to file relative to repo root
 
         Returns:
             Datetime of last modification, or None if file not in git history
         """
-        try:
-            # Get last commit time for this file
-            result = self._run_git(
-                'log', '--format=%ai', '-n', '1', '--', path)
-
-            if result.stdout.strip():
-                # Parse the datetime string
-                from dateutil import parser as dateparser
-                return dateparser.parse(result.stdout.strip())
-            return None
-        except Exception as e:
-            LOGGER.warning(f"Failed to get mtime for {path}: {e}")
-            return None
+        return self.get_file_mtimes([path])[path]
 
     def update_file(
         self,
@@ -186,7 +260,7 @@ class GitBackend(BaseModel):
 
         commit_message = commit_message or f"Update {path}"
 
-        file_path = Path(self.repo_path) / path
+        file_path = self._repo_dir / path
 
         # Create parent directories if needed
         file_path.parent.mkdir(parents=True, exist_ok=True)
@@ -205,26 +279,30 @@ class GitBackend(BaseModel):
 
         # Push if auto_push is enabled
         if self.auto_push:
-            remotes = os.path.join(self.repo_path, '.git', 'refs', 'remotes')
-            if os.path.exists(remotes):
+            if self._has_remotes is None:
+                self._has_remotes = (
+                    self._repo_dir / '.git' / 'refs' / 'remotes').exists()
+            if self._has_remotes:
                 try:
                     self._run_git('push')
                 except Exception as e:
                     LOGGER.exception(f"Failed to push: {e}")
                     raise
             else:
-                logging.info('No push since no remotes in %s', remotes)
+                logging.info('No push since no remotes in %s',
+                             self.repo_path)
 
 
     def write_tree(
         self,
-        files: List[Tuple[str, str]],
+        files: List[Tuple[str, Union[str, bytes]]],
         commit_message: str = 'Update files'
     ) -> None:
         """Write multiple files to the repository in a single commit.
 
         Args:
-            files: List of (path, content) tuples
+            files: List of (path, content) tuples where content is
+                   text or bytes
             commit_message: Commit message for the update
 
         Raises:
@@ -235,19 +313,21 @@ class GitBackend(BaseModel):
         if not files:
             raise ValidationError("files list cannot be empty")
 
-        # Write all files
-        for path, content in files:
-            file_path = Path(self.repo_path) / path
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-
+        # Write all files (creating each parent directory only once)
+        repo_path = self._repo_dir
+        targets = [(repo_path / path, path, content) for path, content in files]
+        for parent in {file_path.parent for file_path, _, _ in targets}:
+            parent.mkdir(parents=True, exist_ok=True)
+        for file_path, path, content in targets:
             try:
-                file_path.write_text(content)
+                file_path.write_bytes(content if isinstance(content, bytes)
+                                      else content.encode('utf-8'))
             except Exception as e:
                 raise ValidationError(
                     f"Failed to write file {path}: {e}") from e
 
-            # Stage the file
-            self._run_git('add', path)
+        # Stage all files with one git process
+        self._run_git('add', '--', *[path for path, _ in files])
 
         # Commit all changes
         self._run_git('commit', '-m', commit_message)
@@ -272,7 +352,7 @@ def update_git_spec(spec, repo_path: str, git_executable: str = '/usr/bin/git'):
         git_executable: Path to git executable
     """
     import logging
-    from pulseox.specs import JOB_REPORT
+    from pulseox.specs import JOB_REPORT_SET
 
     backend = GitBackend(repo_path=repo_path, git_executable=git_executable)
 
@@ -301,7 +381,7 @@ def update_git_spec(spec, repo_path: str, git_executable: str = '/usr/bin/git'):
     # Determine report based on metadata
     metadata_report = metadata.get('report', '').upper()
 
-    if metadata_report in JOB_REPORT:
+    if metadata_report in JOB_REPORT_SET:
         spec.report = metadata_report
     else:
         spec.report = 'BAD'
@@ -312,3 +392,49 @@ def update_git_spec(spec, repo_path: str, git_executable: str = '/usr/bin/git'):
         spec.note = metadata.get('note')
 
     spec.updated = metadata.get('updated')
+
+
+def apply_updates(
+    jobs: List[Tuple[GitBackend, List[Tuple[str, Union[str, bytes]]], str]],
+    max_workers: int = MAX_REPO_WORKERS
+) -> None:
+    """Write files to several repositories concurrently.
+
+    Each job is a (backend, files, commit_message) tuple which is done
+    with backend.write_tree(files, commit_message). Jobs for different
+    repositories run at the same time in a thread pool (git runs in
+    subprocesses so threads overlap fine). Jobs for the same repository
+    run one at a time in the order given since git cannot safely commit
+    to one repository from several processes at once.
+
+    Args:
+        jobs: List of (backend, files, commit_message) tuples
+        max_workers: Maximum number of repositories to write at once
+
+    Raises:
+        ValidationError: The first failure (after all jobs have run)
+    """
+    by_repo: Dict[str, list] = {}
+    for job in jobs:
+        by_repo.setdefault(os.path.realpath(job[0].repo_path), []).append(job)
+
+    def run(repo_jobs):
+        errors = []
+        for backend, files, commit_message in repo_jobs:
+            try:
+                backend.write_tree(files, commit_message)
+            except Exception as e:  # keep going with other jobs
+                LOGGER.error('Failed to write to %s: %s',
+                             backend.repo_path, e)
+                errors.append(e)
+        return errors
+
+    if len(by_repo) <= 1:
+        errors = [e for repo_jobs in by_repo.values() for e in run(repo_jobs)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(
+                max_workers, len(by_repo))) as pool:
+            errors = [e for found in pool.map(run, by_repo.values())
+                      for e in found]
+    if errors:
+        raise errors[0]
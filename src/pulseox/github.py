@@ -1,41 +1,67 @@
 """GitHub backend for PulseOx.
 
 This module contains all GitHub-specific functionality for interacting with
-GitHub repositories via the GitHub API.
+GitHub repositories via the GitHub API. Shared HTTP helpers (sessions,
+headers, caching and encoding) live in pulseox.github_http and writing
+many files in one commit lives in pulseox.github_tree.
 """
 
-import base64
+import collections
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 import logging as rawLogger
-from typing import Optional, List, Tuple, Annotated
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import (Any, BinaryIO, Dict, Iterator, Optional, List, Set,
+                    Tuple, Annotated)
 
 import requests
-from pydantic import BaseModel, Field, SkipValidation
+from pydantic import BaseModel, Field, SkipValidation, PrivateAttr
 
+from pulseox.github_http import (
+    RATE_LIMIT_BACKOFF, RAW_MEDIA_TYPE, NOT_PARSED, remember, cached_get,
+    dump_json, encode_content, file_content, forget_cached_contents,
+    get_headers, get_session, load_json, rate_limit_wait)
+from pulseox.github_tree import GitHubTreeMixin, git_blob_sha
 
 LOGGER = rawLogger.getLogger(__name__)
 
+# Maximum number of specs GitHubBackend.update_specs looks up at once
+MAX_SPEC_WORKERS = 16
 
-def make_headers(token):
-    """Make GitHub API headers.
+# Maximum number of files read by one GraphQL query in update_specs
+GRAPHQL_SPEC_BATCH = 50
 
-    Args:
-        token: GitHub personal access token
 
-    Returns:
-        Dictionary of headers for GitHub API requests
+def spec_files_query(count: int) -> str:
+    """Return a GraphQL query reading count files from one repository.
 
-    Raises:
-        ValueError: If token is empty
+    The query takes variables $owner, $name and $e0 ... $e{count-1}
+    (expressions such as 'HEAD:path') and returns each file as the
+    Blob aliased f0 ... f{count-1} under repository.
     """
-    if not token:
-        raise ValueError('Must set token before interacting with GitHub')
-    return {"Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json"}
+    params = ''.join(f', $e{i}: String!' for i in range(count))
+    fields = ' '.join(
+        f'f{i}: object(expression: $e{i}) {{ ... on Blob {{ text isTruncated }} }}'
+        for i in range(count))
+    return (f'query($owner: String!, $name: String!{params}) {{'
+            f' repository(owner: $owner, name: $name) {{ {fields} }} }}')
+
+
+# Spec metadata parsed from responses (see _apply_spec_response),
+# dropped with the response.
+_PARSED_METADATA: 'weakref.WeakKeyDictionary[Any, Optional[dict]]' = (
+    weakref.WeakKeyDictionary())
 
 
 def download_github_file(token: str, owner: str, repo: str, path: str,
                          ref: str = "main", timeout: int = 30,
-                         base_url: str = "https://api.github.com") -> bytes:
+                         base_url: str = "https://api.github.com",
+                         session: Optional[requests.Session] = None
+                         ) -> bytes:
     """Download a file from a GitHub repository.
 
     Args:
@@ -46,6 +72,7 @@ def download_github_file(token: str, owner: str, repo: str, path: str,
         ref: Branch, tag, or commit SHA (default: "main")
         timeout: Request timeout in seconds
         base_url: GitHub API base URL
+        session: Optional requests.Session to use (default: shared session)
 
     Returns:
         File contents as bytes
@@ -58,23 +85,170 @@ def download_github_file(token: str, owner: str, repo: str, path: str,
     url = f"{base_url}/repos/{owner}/{repo}/contents/{path}"
     params = {"ref": ref}
 
-    headers = make_headers(token)
-    response = requests.get(url, headers=headers, params=params,
-                            timeout=timeout)
+    # Ask for the raw media type so the body is the file itself: no JSON
+    # to parse, no base64 to decode and files above 1 MB work too.
+    response = cached_get(url, token, params=params, timeout=timeout,
+                          session=session, accept=RAW_MEDIA_TYPE)
     response.raise_for_status()
 
-    data = response.json()
-
-    # GitHub API returns file content as base64-encoded string
-    if "content" not in data:
+    content = file_content(response)
+    if content is None:
         raise ValueError(f"No content found for file: {path}")
-
-    # Decode the base64 content
-    content = base64.b64decode(data["content"])
     return content
 
 
-class GitHubBackend(BaseModel):
+def stream_github_file(token: str, owner: str, repo: str, path: str,
+                       fileobj: BinaryIO, ref: str = "main",
+                       timeout: int = 30,
+                       base_url: str = "https://api.github.com",
+                       session: Optional[requests.Session] = None,
+                       chunk_size: int = 1 << 16) -> int:
+    """Download a file from a GitHub repository into fileobj.
+
+    Unlike download_github_file, the body is streamed in chunks of
+    chunk_size bytes instead of being held in memory (and the lookup
+    is not cached), which suits large files written to disk.
+
+    Args:
+        token: Github token.
+        owner: Repository owner (username or organization)
+        repo: Repository name
+        path: Path to the file within the repository
+        fileobj: Binary file-like object to write the contents to
+        ref: Branch, tag, or commit SHA (default: "main")
+        timeout: Request timeout in seconds
+        base_url: GitHub API base URL
+        session: Optional requests.Session to use (default: shared session)
+        chunk_size: Number of bytes to read at a time
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        requests.HTTPError: If the request fails (e.g., file not found,
+                            auth issues)
+        ValueError: If the response doesn't contain expected content
+    """
+    url = f"{base_url}/repos/{owner}/{repo}/contents/{path}"
+    with (session or get_session()).get(
+            url, headers=get_headers(token, RAW_MEDIA_TYPE),
+            params={"ref": ref}, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        if response.headers.get('Content-Type', '').startswith(
+                'application/json'):  # server ignored the raw media type
+            content = file_content(response)
+            if content is None:
+                raise ValueError(f"No content found for file: {path}")
+            fileobj.write(content)
+            return len(content)
+        written = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            fileobj.write(chunk)
+            written += len(chunk)
+        return written
+
+
+class PersistentShaCache:
+    """Map from GitHub contents URL to file SHA persisted in sqlite.
+
+    GitHubBackend remembers the SHA of each file it writes so the next
+    update can skip the GET for the SHA. Backing that map with a file
+    lets short-lived processes (e.g., cron jobs posting status) get the
+    same benefit across restarts. Stale entries are harmless since the
+    backend falls back to a GET when GitHub rejects the SHA.
+
+    The database is only opened once needed (and only created by the
+    first write) and then one connection is kept until close. Use the
+    cache as a context manager to close it when done.
+
+    Args:
+        path: Path to sqlite database file (created if needed)
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        # The connection is shared by the worker threads used by
+        # PulseOxClient.apost, so only one of them uses it at a time.
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'PersistentShaCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection to the database (if open)."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @contextlib.contextmanager
+    def _connect(self, create: bool = True
+                 ) -> Iterator[Optional[sqlite3.Connection]]:
+        """Yield the connection in a transaction while holding the lock.
+
+        Args:
+            create: If False and the database file does not exist yet,
+                    yield None instead of creating it.
+        """
+        with self._lock:
+            if self._conn is None:
+                if not create and not os.path.exists(self.path):
+                    yield None
+                    return
+                self._conn = self._open()
+            with self._conn:
+                yield self._conn
+
+    def _open(self) -> sqlite3.Connection:
+        """Open (and create if needed) the database at self.path."""
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10,
+                               check_same_thread=False)
+        try:
+            with conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('CREATE TABLE IF NOT EXISTS known_sha ('
+                             'url TEXT PRIMARY KEY, sha TEXT NOT NULL,'
+                             ' last_used INTEGER NOT NULL)')
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def get(self, url: str, default: Optional[str] = None
+            ) -> Optional[str]:
+        """Return SHA stored for url or default if there is none."""
+        with self._connect(create=False) as conn:
+            row = conn and conn.execute(
+                'SELECT sha FROM known_sha WHERE url = ?',
+                (url,)).fetchone()
+        return row[0] if row else default
+
+    def __setitem__(self, url: str, sha: str) -> None:
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO known_sha'
+                         ' (url, sha, last_used) VALUES (?, ?, ?)',
+                         (url, sha, int(time.time())))
+
+    def pop(self, url: str, default: Optional[str] = None
+            ) -> Optional[str]:
+        """Remove url from the cache returning its SHA (or default)."""
+        with self._connect(create=False) as conn:
+            if conn is None:
+                return default
+            row = conn.execute('SELECT sha FROM known_sha WHERE url = ?',
+                               (url,)).fetchone()
+            conn.execute('DELETE FROM known_sha WHERE url = ?', (url,))
+        return row[0] if row else default
+
+
+class GitHubBackend(GitHubTreeMixin, BaseModel):
     """Backend for GitHub API operations.
 
     This class encapsulates all GitHub-specific operations including
@@ -83,14 +257,47 @@ class GitHubBackend(BaseModel):
     Args:
         token: GitHub personal access token
         base_url: GitHub API base URL (default: https://api.github.com)
+        tokens: Optional extra tokens to rotate through with token
     """
 
     token: Annotated[str, Field(exclude=True, default='', description=(
         'GitHub personal access token to access repo.'))]
 
+    tokens: Annotated[List[str], Field(
+        exclude=True, default_factory=list, description=(
+            'Optional extra GitHub tokens used round-robin along with'
+            ' token. GitHub rate limits are per token, so a pool of'
+            ' tokens raises the effective rate limit.'))]
+
     base_url: Annotated[str, Field(default="https://api.github.com",
                                    description='GitHub API base URL')]
 
+    session: Annotated[Any, Field(default=None, exclude=True, description=(
+        'Optional requests.Session used for GitHub API calls. If not'
+        ' provided, the shared session from get_session is used.'))]
+
+    sha_cache_path: Annotated[Optional[str], Field(
+        default_factory=lambda: os.environ.get('PULSEOX_SHA_CACHE'),
+        description=(
+            'Optional path to a sqlite file used to remember file SHAs'
+            ' written by this backend across processes (see'
+            ' PersistentShaCache). Defaults to the PULSEOX_SHA_CACHE'
+            ' environment variable.'))]
+
+    use_graphql: Annotated[bool, Field(
+        default_factory=lambda: bool(os.environ.get('PULSEOX_USE_GRAPHQL')),
+        description=(
+            'If True, write_github_tree makes its commit with a single'
+            ' GraphQL createCommitOnBranch mutation instead of a series'
+            ' of REST git data calls and update_specs reads the files of'
+            ' many specs per GraphQL query. Defaults to whether the'
+            ' PULSEOX_USE_GRAPHQL environment variable is set.'))]
+
+    max_rate_limit_wait: Annotated[float, Field(default=60.0, description=(
+        'Longest time in seconds to wait for a GitHub rate limit to'
+        ' clear. Longer waits are not attempted and the rate limited'
+        ' response is returned as is.'))]
+
     _latest_response: Annotated[
         Optional[SkipValidation[requests.Response]], Field(
             description=('Latest response object from interacting with'
@@ -98,6 +305,245 @@ class GitHubBackend(BaseModel):
                          ' verify or investigate response from the'
                          ' GitHub API.'), default=None, exclude=True)]
 
+    # Maps contents (or branch ref) URL to (etag, sha) from the last
+    # successful GET so that later lookups can send If-None-Match. GitHub
+    # answers 304 with no body when unchanged and 304s do not count
+    # against rate limits.
+    _etag_cache: Dict[str, Tuple[str, str]] = PrivateAttr(
+        default_factory=dict)
+
+    # Maps commit SHA to its tree SHA for commits we have looked up or
+    # made (commits are immutable so entries never go stale).
+    _commit_trees: Dict[str, str] = PrivateAttr(default_factory=dict)
+
+    # Maps tree SHA to its path -> blob SHA entries for the last few
+    # trees read by _changed_files (trees are immutable too).
+    _tree_blobs: 'collections.OrderedDict[str, Dict[str, str]]' = (
+        PrivateAttr(default_factory=collections.OrderedDict))
+
+    # Maps contents URL to the file SHA returned by our last PUT so the
+    # next update can skip the GET and PUT directly. This is replaced
+    # by a PersistentShaCache if sha_cache_path is set.
+    _known_sha: Any = PrivateAttr(default_factory=dict)
+
+    # Contents URLs that GitHub last told us do not exist (a 404) and
+    # that we have not written since, so writes can create them without
+    # first asking for a SHA.
+    _absent_urls: Set[str] = PrivateAttr(default_factory=set)
+
+    # Tokens to rotate through; the head of the deque is used next.
+    # The (token, tokens) it was built from is kept to notice changes.
+    _token_pool: Any = PrivateAttr(default=None)
+    _token_pool_source: Tuple[str, List[str]] = PrivateAttr(
+        default=('', []))
+
+    # Latest primary rate limit seen for each token as
+    # (remaining, reset epoch seconds).
+    _rate_limits: Dict[str, Tuple[Optional[int], float]] = PrivateAttr(
+        default_factory=dict)
+
+    def model_post_init(self, __context):
+        """Set up the pooled session (and SHA cache) as needed."""
+        if self.session is None:
+            self.session = get_session()
+        if self.sha_cache_path:
+            self._known_sha = PersistentShaCache(self.sha_cache_path)
+
+    def get_latest_response(self) -> Optional[requests.Response]:
+        """Return the response to the latest request that wrote to GitHub.
+
+        This is None if no request was needed (e.g., write_github_file
+        skipped an unchanged file).
+        """
+        return self._latest_response
+
+    def _get_headers(self, token: Optional[str] = None,
+                     content_type: Optional[str] = None) -> Dict[str, str]:
+        """Return GitHub API headers for token (default self.token).
+
+        The headers are built once per token and shared (see
+        get_headers). Callers needing extra headers should copy rather
+        than modify.
+        """
+        return get_headers(self.token if token is None else token,
+                           content_type=content_type)
+
+    def _next_token(self) -> Tuple[str, float]:
+        """Pick the token for the next request.
+
+        Rotates through self.token and self.tokens, skipping tokens whose
+        primary rate limit is used up.
+
+        Returns:
+            Tuple of (token, seconds to wait before using it) where the
+            wait is only positive if every token is used up.
+        """
+        if (self._token_pool is None
+                or self._token_pool_source != (self.token, self.tokens)):
+            self._token_pool = collections.deque(
+                dict.fromkeys([self.token] + self.tokens))
+            self._token_pool_source = (self.token, list(self.tokens))
+        now = time.time()
+        waits = []
+        for _ in range(len(self._token_pool)):
+            token = self._token_pool[0]
+            self._token_pool.rotate(-1)
+            remaining, reset = self._rate_limits.get(token, (None, 0.0))
+            if remaining != 0 or reset <= now:
+                return token, 0.0
+            waits.append((reset - now, token))
+        wait, token = min(waits)
+        return token, wait
+
+    def _request(self, method: str, url: str,
+                 **kwargs) -> requests.Response:
+        """Make a GitHub API request while respecting rate limits.
+
+        Requests rotate through the token pool (see _next_token). If
+        every token has used up its primary rate limit, wait for the
+        earliest reset before sending. Rate limited responses are
+        retried with the next token if one is available, or else with
+        exponential backoff (or after the wait GitHub asks for). Waits
+        longer than max_rate_limit_wait are skipped.
+
+        Args:
+            method: HTTP method (e.g., 'GET')
+            url: URL to request
+            **kwargs: Passed to self.session.request (any headers given
+                      are added to the usual GitHub API headers and any
+                      json body is serialized with dump_json)
+
+        Returns:
+            Response from GitHub API
+
+        Raises:
+            requests.RequestException: If the request fails
+        """
+        extra_headers = kwargs.pop('headers', None)
+        content_type = None
+        if kwargs.get('json') is not None:
+            kwargs['data'] = dump_json(kwargs.pop('json'))
+            content_type = 'application/json'
+        kwargs.setdefault('timeout', 30)
+        token, wait = self._next_token()
+        if 0 < wait <= self.max_rate_limit_wait:
+            LOGGER.warning('Rate limit used up; waiting %.1fs', wait)
+            time.sleep(wait)
+
+        for backoff in RATE_LIMIT_BACKOFF + (None,):
+            headers = self._get_headers(token, content_type)
+            if extra_headers:
+                headers = {**headers, **extra_headers}
+            response = self.session.request(
+                method, url, headers=headers, **kwargs)
+            self._note_rate_limit(token, response)
+            wait = rate_limit_wait(response, default=backoff or 0)
+            if backoff is None or wait is None:
+                return response
+            if len(self._token_pool) > 1:
+                token, wait = self._next_token()
+            if wait > self.max_rate_limit_wait:
+                return response
+            LOGGER.warning('Rate limited (status %s) on %s; waiting %.1fs',
+                           response.status_code, url, wait)
+            time.sleep(wait)
+        return response  # not reached; the final attempt returns above
+
+    def _note_rate_limit(self, token: str,
+                         response: requests.Response) -> None:
+        """Remember primary rate limit info for token from response."""
+        try:
+            self._rate_limits[token] = (
+                int(response.headers['X-RateLimit-Remaining']),
+                float(response.headers['X-RateLimit-Reset']))
+        except (KeyError, ValueError):
+            pass
+
+    def update_specs(self, specs: list,
+                     max_workers: int = MAX_SPEC_WORKERS) -> None:
+        """Update many PulseOxSpecs from GitHub concurrently.
+
+        Each lookup (see update_github_spec) uses the next token from
+        the token pool. If every token has used up its rate limit, a
+        lookup first waits for the earliest reset (up to
+        max_rate_limit_wait).
+
+        If self.use_graphql is True, the files of specs in the same
+        repository are first read with one GraphQL query per
+        GRAPHQL_SPEC_BATCH specs (see _update_specs_graphql) and only
+        the specs that query could not settle are looked up one by one.
+
+        Args:
+            specs: PulseOxSpec instances to update
+            max_workers: Maximum number of lookups to run at once
+        """
+        if self.use_graphql:
+            specs = self._update_specs_graphql(specs)
+
+        def update(spec):
+            token, wait = self._next_token()
+            if 0 < wait <= self.max_rate_limit_wait:
+                LOGGER.warning('Rate limit used up; waiting %.1fs', wait)
+                time.sleep(wait)
+            response = update_github_spec(spec, token, self.base_url,
+                                          session=self.session)
+            if response is not None:
+                self._note_rate_limit(token, response)
+
+        if len(specs) < 2:
+            for spec in specs:
+                update(spec)
+            return
+        with ThreadPoolExecutor(max_workers=min(
+                max_workers, len(specs))) as pool:
+            list(pool.map(update, specs))
+
+    def _update_specs_graphql(self, specs: list) -> list:
+        """Update specs by reading their files with GraphQL queries.
+
+        Specs are grouped by repository and each query reads up to
+        GRAPHQL_SPEC_BATCH files from the default branch, so N specs in
+        one repository take about N / GRAPHQL_SPEC_BATCH requests instead
+        of N.
+
+        Returns:
+            List of specs that were not updated (e.g., the query failed,
+            the file is missing, binary or too large) which the caller
+            should look up with the REST API to get the usual notes.
+        """
+        by_repo: Dict[Tuple[str, str], list] = {}
+        for spec in specs:
+            by_repo.setdefault((spec.owner, spec.repo), []).append(spec)
+
+        remaining = []
+        for (owner, repo), repo_specs in by_repo.items():
+            for start in range(0, len(repo_specs), GRAPHQL_SPEC_BATCH):
+                batch = repo_specs[start:start + GRAPHQL_SPEC_BATCH]
+                variables = {"owner": owner, "name": repo}
+                variables.update((f"e{i}", f"HEAD:{spec.path}")
+                                 for i, spec in enumerate(batch))
+                try:
+                    response = self._request('POST', self.graphql_url(), json={
+                        "query": spec_files_query(len(batch)),
+                        "variables": variables})
+                    data = load_json(response) if (
+                        response.status_code == 200) else {}
+                    files = (data.get('data') or {}).get('repository') or {}
+                except (requests.RequestException, ValueError,
+                        AttributeError) as e:
+                    LOGGER.warning('GraphQL lookup of %d specs in %s/%s'
+                                   ' failed: %s', len(batch), owner, repo, e)
+                    files = {}
+                for i, spec in enumerate(batch):
+                    blob = files.get(f"f{i}") or {}
+                    if blob.get('text') is None or blob.get('isTruncated'):
+                        remaining.append(spec)
+                        continue
+                    spec.report = 'NOT_REPORTED'
+                    spec.note = None
+                    _apply_spec_content(spec, blob['text'])
+        return remaining
+
     def update_file(
         self,
         owner: str,
@@ -119,31 +565,12 @@ class GitHubBackend(BaseModel):
         Raises:
             GitHubAPIError: If the API request fails
         """
-        from pulseox.specs import GitHubAPIError, ValidationError
+        from pulseox.specs import ValidationError
 
         url = f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
 
-        # Get current file SHA if it exists
         try:
-            get_response = requests.get(
-                url, headers=make_headers(self.token), timeout=30
-            )
-        except requests.RequestException as e:
-            raise GitHubAPIError(f"Failed to fetch file info: {e}") from e
-
-        sha = None
-        if get_response.status_code == 200:
-            try:
-                sha = get_response.json().get("sha")
-            except (ValueError, KeyError) as e:
-                raise GitHubAPIError(f"Failed to parse GitHub response: {e}"
-                                     ) from e
-
-        # Prepare update payload
-        try:
-            encoded_content = base64.b64encode(
-                content.encode('utf-8')
-            ).decode('utf-8')
+            encoded_content = encode_content(content)
         except UnicodeEncodeError as e:
             raise ValidationError(f"Failed to encode content: {e}") from e
 
@@ -152,16 +579,92 @@ class GitHubBackend(BaseModel):
             "content": encoded_content,
         }
 
+        sha = self._known_sha.get(url)
+        if sha:  # Optimistically PUT with the SHA from our last write
+            response = self._put_contents(url, {**payload, "sha": sha})
+            if response.status_code not in (409, 422):
+                return response
+            LOGGER.debug('Stale SHA for %s; fetching current SHA', url)
+            self._forget_sha(url)
+        elif url in self._absent_urls:  # Create without looking up a SHA
+            response = self._put_contents(url, payload)
+            if response.status_code not in (409, 422):
+                return response
+            LOGGER.debug('File %s exists after all; fetching SHA', url)
+            self._absent_urls.discard(url)
+
+        sha = self._fetch_sha(url)
         if sha:
             payload["sha"] = sha
+        return self._put_contents(url, payload)
+
+    def _forget_sha(self, url: str) -> None:
+        """Drop what we know about the SHA at contents `url`.
+
+        Used when GitHub rejects a PUT with our SHA (409 or 422) since
+        the file was changed elsewhere.
+        """
+        self._known_sha.pop(url, None)
+        self._etag_cache.pop(url, None)
+
+    def _fetch_sha(self, url: str) -> Optional[str]:
+        """Get the SHA of the file at contents `url` (None if missing).
+
+        Uses If-None-Match with the ETag from any previous lookup so an
+        unchanged file costs a bodyless 304 response.
+
+        Raises:
+            GitHubAPIError: If the API request fails
+        """
+        from pulseox.specs import GitHubAPIError
+
+        headers = None
+        cached = self._etag_cache.get(url)
+        if cached:
+            headers = {"If-None-Match": cached[0]}
+        try:
+            get_response = self._request('GET', url, headers=headers)
+        except requests.RequestException as e:
+            raise GitHubAPIError(f"Failed to fetch file info: {e}") from e
+
+        sha = None
+        if get_response.status_code == 304 and cached:
+            sha = cached[1]
+        elif get_response.status_code == 200:
+            try:
+                sha = load_json(get_response).get("sha")
+            except (ValueError, KeyError) as e:
+                raise GitHubAPIError(f"Failed to parse GitHub response: {e}"
+                                     ) from e
+            etag = get_response.headers.get("ETag")
+            if etag and sha:
+                self._etag_cache[url] = (etag, sha)
+        elif get_response.status_code == 404:
+            self._absent_urls.add(url)
+            self._etag_cache.pop(url, None)
+        return sha
+
+    def _put_contents(self, url: str, payload: dict) -> requests.Response:
+        """PUT payload to contents `url` and remember the new file SHA.
+
+        Raises:
+            GitHubAPIError: If the API request fails
+        """
+        from pulseox.specs import GitHubAPIError
 
         try:
-            response = requests.put(
-                url, json=payload, headers=make_headers(self.token),
-                timeout=30)
+            response = self._request(
+                'PUT', url, json=payload)
         except requests.RequestException as e:
             raise GitHubAPIError(f"Failed to update file: {e}") from e
 
+        if response.status_code in (200, 201):
+            forget_cached_contents(url)
+            self._absent_urls.discard(url)
+            try:
+                self._known_sha[url] = load_json(response)["content"]["sha"]
+            except (ValueError, KeyError, TypeError):
+                self._known_sha.pop(url, None)
         self._latest_response = response
         return response
 
@@ -175,6 +678,13 @@ class GitHubBackend(BaseModel):
     ) -> None:
         """Write given content to path on GitHub.
 
+        If we know the SHA from our last write of path and content
+        differs from it, we PUT optimistically with that SHA. Otherwise
+        (or if GitHub rejects that SHA) the current SHA is looked up
+        with a conditional GET (see _fetch_sha). If it matches the SHA
+        of content, the file is unchanged and no commit is made
+        (self._latest_response is then None).
+
         Args:
             owner: Repository owner
             repo: Repository name
@@ -186,274 +696,67 @@ class GitHubBackend(BaseModel):
             ValidationError: If parameters are invalid
             GitHubAPIError: If the API request fails
         """
-        from pulseox.specs import ValidationError, GitHubAPIError
+        from pulseox.specs import ValidationError, require_text
 
         commit_message = commit_message or f"Update {path}"
-        if not owner or not owner.strip():
-            raise ValidationError("owner cannot be empty")
-        if not repo or not repo.strip():
-            raise ValidationError("repo cannot be empty")
-        if not path or not path.strip():
-            raise ValidationError("path cannot be empty")
+        require_text(owner, 'owner')
+        require_text(repo, 'repo')
+        require_text(path, 'path')
 
         url = (
             f"{self.base_url}/repos/{owner}/{repo}/contents/"
             f"{path}"
         )
 
-        try:  # Get current file SHA if exists
-            get_response = requests.get(
-                url, headers=make_headers(token=self.token), timeout=30)
-        except requests.RequestException as e:
-            raise GitHubAPIError(
-                f"Failed to fetch summary file info: {e}")
-
-        sha = None
-        if get_response.status_code == 200:
-            try:
-                sha = get_response.json().get("sha")
-            except (ValueError, KeyError) as e:
-                raise GitHubAPIError(
-                    f"Failed to parse GitHub response: {e}")
-
-        try:  # Encode and prepare payload
-            encoded_content = base64.b64encode(
-                content.encode('utf-8')).decode('utf-8')
+        try:
+            raw = content if isinstance(content, bytes) else content.encode(
+                'utf-8')
         except UnicodeEncodeError as e:
-            raise ValidationError(f"Failed to encode summary: {e}")
-
-        payload = {"message": commit_message, "content": encoded_content}
+            raise ValidationError(f"Failed to encode summary: {e}") from e
+
+        blob_sha = git_blob_sha(raw)
+        payload = {"message": commit_message, "content": encode_content(raw)}
+
+        known = self._known_sha.get(url)
+        if known and known != blob_sha:  # skip the GET for the SHA
+            response = self._put_contents(url, {**payload, "sha": known})
+            if response.status_code not in (409, 422):
+                return
+            LOGGER.debug('Stale SHA for %s; fetching current SHA', url)
+            self._forget_sha(url)
+        elif url in self._absent_urls:  # Create without looking up a SHA
+            response = self._put_contents(url, payload)
+            if response.status_code not in (409, 422):
+                return
+            LOGGER.debug('File %s exists after all; fetching SHA', url)
+            self._absent_urls.discard(url)
+
+        sha = self._fetch_sha(url)  # current file SHA if file exists
+        if sha and sha == blob_sha:
+            LOGGER.debug('Skipping write of unchanged %s', path)
+            self._latest_response = None
+            return
 
         if sha:
             payload["sha"] = sha
 
-        try:
-            response = requests.put(
-                url, json=payload, headers=make_headers(
-                    token=self.token), timeout=30)
-        except requests.RequestException as e:
-            raise GitHubAPIError(f"Failed to write summary: {e}")
-
-        self._latest_response = response
-
-    def write_github_tree(
-        self,
-        owner: str,
-        repo: str,
-        files: List[Tuple[str, str]],
-        commit_message: str = 'Update files',
-        branch: str = 'main'
-    ) -> None:
-        """Write multiple files to GitHub in a single commit.
+        self._put_contents(url, payload)
 
-        Args:
-            owner: Repository owner
-            repo: Repository name
-            files: List of (path, content) tuples
-            commit_message: Commit message for the update
-            branch: Branch name to commit to (default: 'main')
+    def graphql_url(self) -> str:
+        """Return the GraphQL endpoint for self.base_url.
 
-        Raises:
-            ValidationError: If parameters are invalid
-            GitHubAPIError: If the API request fails
+        GitHub Enterprise serves REST under /api/v3 and GraphQL under
+        /api/graphql while github.com uses /graphql on the API host.
         """
-        from pulseox.specs import ValidationError, GitHubAPIError
-
-        if not owner or not owner.strip():
-            raise ValidationError("owner cannot be empty")
-        if not repo or not repo.strip():
-            raise ValidationError("repo cannot be empty")
-        if not files:
-            raise ValidationError("files list cannot be empty")
-
-        LOGGER.debug(f"Starting write_github_tree for {len(files)} files to {owner}/{repo} branch {branch}")
+        base = self.base_url.rstrip('/')
+        if base.endswith('/v3'):
+            return base[:-len('v3')] + 'graphql'
+        return base + '/graphql'
 
-        # Get reference to branch
-        ref_url = f"{self.base_url}/repos/{owner}/{repo}/git/refs/heads/{branch}"
-        LOGGER.debug(f"Fetching branch reference from {ref_url}")
 
-        try:
-            ref_response = requests.get(
-                ref_url, headers=make_headers(token=self.token), timeout=30)
-        except requests.RequestException as e:
-            LOGGER.error(f"Request exception getting branch reference: {e}")
-            raise GitHubAPIError(f"Failed to get branch reference: {e}")
-
-        LOGGER.debug(f"Branch reference response: status={ref_response.status_code}")
-        if ref_response.status_code != 200:
-            LOGGER.error(f"Failed to get branch reference: {ref_response.text}")
-            raise GitHubAPIError(
-                f"Failed to get branch reference (status {ref_response.status_code}): {ref_response.text}")
-
-        try:
-            base_commit_sha = ref_response.json()['object']['sha']
-            LOGGER.debug(f"Base commit SHA: {base_commit_sha}")
-        except (ValueError, KeyError) as e:
-            LOGGER.error(f"Failed to parse branch reference: {e}, response: {ref_response.text}")
-            raise GitHubAPIError(f"Failed to parse branch reference: {e}")
-
-        # Get base commit to find base tree
-        commit_url = f"{self.base_url}/repos/{owner}/{repo}/git/commits/{base_commit_sha}"
-        LOGGER.debug(f"Fetching base commit from {commit_url}")
 
-        try:
-            commit_response = requests.get(
-                commit_url, headers=make_headers(token=self.token), timeout=30)
-        except requests.RequestException as e:
-            LOGGER.error(f"Request exception getting base commit: {e}")
-            raise GitHubAPIError(f"Failed to get base commit: {e}")
-
-        LOGGER.debug(f"Base commit response: status={commit_response.status_code}")
-        if commit_response.status_code != 200:
-            LOGGER.error(f"Failed to get base commit: {commit_response.text}")
-            raise GitHubAPIError(
-                f"Failed to get base commit (status {commit_response.status_code}): {commit_response.text}")
-
-        try:
-            base_tree_sha = commit_response.json()['tree']['sha']
-            LOGGER.debug(f"Base tree SHA: {base_tree_sha}")
-        except (ValueError, KeyError) as e:
-            LOGGER.error(f"Failed to parse commit response: {e}, response: {commit_response.text}")
-            raise GitHubAPIError(f"Failed to parse commit response: {e}")
-
-        # Create blobs for each file
-        tree_items = []
-        for path, content in files:
-            if not path or not path.strip():
-                raise ValidationError("file path cannot be empty")
-
-            LOGGER.debug(f"Creating blob for {path} ({len(content)} bytes)")
-
-            # Create blob
-            blob_url = f"{self.base_url}/repos/{owner}/{repo}/git/blobs"
-            try:
-                encoded_content = base64.b64encode(
-                    content.encode('utf-8')).decode('utf-8')
-            except UnicodeEncodeError as e:
-                LOGGER.error(f"Failed to encode content for {path}: {e}")
-                raise ValidationError(f"Failed to encode content for {path}: {e}")
-
-            blob_payload = {
-                "content": encoded_content,
-                "encoding": "base64"
-            }
-
-            try:
-                blob_response = requests.post(
-                    blob_url, json=blob_payload,
-                    headers=make_headers(token=self.token), timeout=30)
-            except requests.RequestException as e:
-                LOGGER.error(f"Request exception creating blob for {path}: {e}")
-                raise GitHubAPIError(f"Failed to create blob for {path}: {e}")
-
-            LOGGER.debug(f"Blob response for {path}: status={blob_response.status_code}")
-            if blob_response.status_code != 201:
-                LOGGER.error(f"Failed to create blob for {path}: {blob_response.text}")
-                raise GitHubAPIError(
-                    f"Failed to create blob for {path} (status {blob_response.status_code}): {blob_response.text}")
-
-            try:
-                blob_sha = blob_response.json()['sha']
-                LOGGER.debug(f"Blob SHA for {path}: {blob_sha}")
-            except (ValueError, KeyError) as e:
-                LOGGER.error(f"Failed to parse blob response for {path}: {e}, response: {blob_response.text}")
-                raise GitHubAPIError(f"Failed to parse blob response for {path}: {e}")
-
-            tree_items.append({
-                "path": path,
-                "mode": "100644",
-                "type": "blob",
-                "sha": blob_sha
-            })
-
-        # Create tree
-        tree_url = f"{self.base_url}/repos/{owner}/{repo}/git/trees"
-        tree_payload = {
-            "base_tree": base_tree_sha,
-            "tree": tree_items
-        }
-
-        LOGGER.debug(f"Creating tree with {len(tree_items)} items")
-
-        try:
-            tree_response = requests.post(
-                tree_url, json=tree_payload,
-                headers=make_headers(token=self.token), timeout=30)
-        except requests.RequestException as e:
-            LOGGER.error(f"Request exception creating tree: {e}")
-            raise GitHubAPIError(f"Failed to create tree: {e}")
-
-        LOGGER.debug(f"Tree response: status={tree_response.status_code}")
-        if tree_response.status_code != 201:
-            LOGGER.error(f"Failed to create tree: {tree_response.text}")
-            raise GitHubAPIError(
-                f"Failed to create tree (status {tree_response.status_code}): {tree_response.text}")
-
-        try:
-            new_tree_sha = tree_response.json()['sha']
-            LOGGER.debug(f"New tree SHA: {new_tree_sha}")
-        except (ValueError, KeyError) as e:
-            LOGGER.error(f"Failed to parse tree response: {e}, response: {tree_response.text}")
-            raise GitHubAPIError(f"Failed to parse tree response: {e}")
-
-        # Create commit
-        commit_url = f"{self.base_url}/repos/{owner}/{repo}/git/commits"
-        commit_payload = {
-            "message": commit_message,
-            "tree": new_tree_sha,
-            "parents": [base_commit_sha]
-        }
-
-        LOGGER.debug(f"Creating commit with message: {commit_message}")
-
-        try:
-            new_commit_response = requests.post(
-                commit_url, json=commit_payload,
-                headers=make_headers(token=self.token), timeout=30)
-        except requests.RequestException as e:
-            LOGGER.error(f"Request exception creating commit: {e}")
-            raise GitHubAPIError(f"Failed to create commit: {e}")
-
-        LOGGER.debug(f"Commit response: status={new_commit_response.status_code}")
-        if new_commit_response.status_code != 201:
-            LOGGER.error(f"Failed to create commit: {new_commit_response.text}")
-            raise GitHubAPIError(
-                f"Failed to create commit (status {new_commit_response.status_code}): {new_commit_response.text}")
-
-        try:
-            new_commit_sha = new_commit_response.json()['sha']
-            LOGGER.debug(f"New commit SHA: {new_commit_sha}")
-        except (ValueError, KeyError) as e:
-            LOGGER.error(f"Failed to parse commit response: {e}, response: {new_commit_response.text}")
-            raise GitHubAPIError(f"Failed to parse commit response: {e}")
-
-        # Update reference
-        update_ref_payload = {
-            "sha": new_commit_sha,
-            "force": False
-        }
-
-        LOGGER.debug(f"Updating branch reference to {new_commit_sha}")
-
-        try:
-            update_response = requests.patch(
-                ref_url, json=update_ref_payload,
-                headers=make_headers(token=self.token), timeout=30)
-        except requests.RequestException as e:
-            LOGGER.error(f"Request exception updating reference: {e}")
-            raise GitHubAPIError(f"Failed to update reference: {e}")
-
-        LOGGER.debug(f"Update reference response: status={update_response.status_code}")
-        if update_response.status_code not in (200, 201):
-            LOGGER.error(f"Failed to update reference: {update_response.text}")
-            raise GitHubAPIError(
-                f"Failed to update reference (status {update_response.status_code}): {update_response.text}")
-
-        LOGGER.debug("Successfully completed write_github_tree")
-        self._latest_response = update_response
-
-
-def update_github_spec(spec, token: str, base_url: str = "https://api.github.com"):
+def update_github_spec(spec, token: str, base_url: str = "https://api.github.com",
+                       session: Optional[requests.Session] = None):
     """Update a PulseOxSpec by querying GitHub.
 
     This function queries GitHub to update the report status of a spec.
@@ -462,9 +765,12 @@ def update_github_spec(spec, token: str, base_url: str = "https://api.github.com
         spec: PulseOxSpec instance to update
         token: GitHub personal access token
         base_url: GitHub API base URL
+        session: Optional requests.Session to use (default: shared session)
+
+    Returns:
+        Response from the lookup (None on network errors)
     """
     import logging
-    from pulseox.specs import JOB_REPORT
 
     url = (f"{base_url}/repos/{spec.owner}/{spec.repo}/contents/"
            f"{spec.path}")
@@ -473,51 +779,84 @@ def update_github_spec(spec, token: str, base_url: str = "https://api.github.com
     spec.note = None
 
     try:
-        response = requests.get(
-            url, headers=make_headers(token=token), timeout=30)
+        response = cached_get(url, token, session=session,
+                              accept=RAW_MEDIA_TYPE)
     except requests.RequestException as problem:
         # Network error, treat as missing
         logging.exception('Problem try to get report.')
         spec.note = 'network error: ' + str(problem)
-        return
+        return None
+
+    _apply_spec_response(spec, response)
+    return response
+
 
+def _apply_spec_response(spec, response: requests.Response) -> None:
+    """Update spec from the response to a contents lookup of its file.
+
+    The parsed metadata is remembered for the response (in
+    _PARSED_METADATA) so that when cached_get returns the same response
+    again (e.g., GitHub answered 304 Not Modified) the file is not
+    decoded and parsed again.
+    """
     status_code = getattr(response, 'status_code', -1)
     if status_code != 200:
         spec.note = f'error: ({status_code=}) ' + getattr(
             response, 'reason', 'unknown')
         return
 
+    try:
+        metadata = _PARSED_METADATA.get(response, NOT_PARSED)
+    except TypeError:  # not weakly referenceable so never remembered
+        metadata = NOT_PARSED
+    if metadata is not NOT_PARSED:
+        _apply_spec_metadata(spec, metadata)
+        return
+
     try:  # Decode content
-        response_data = response.json()
-        if 'content' not in response_data:
-            logging.exception("No content in response")
+        content = file_content(response)
+        if content is None:
+            LOGGER.error('No content in response for %s', spec.path)
             spec.note = "No content in GitHub response"
             return
-        content = base64.b64decode(response_data['content']).decode(
-            'utf-8')
+        content = content.decode('utf-8')
     except (ValueError, KeyError, UnicodeDecodeError) as problem:
         spec.note = f'Problem decoding GitHub response: {problem}'
-        logging.exception(spec.note)
+        LOGGER.exception('%s', spec.note)
         # Failed to decode, treat as missing metadata
         return
 
-    # Parse metadata
     metadata = spec._parse_metadata(content)
+    remember(_PARSED_METADATA, response, metadata)
+    _apply_spec_metadata(spec, metadata)
+
+
+def _apply_spec_content(spec, content: str) -> None:
+    """Update spec from the text of its file.
+    """
+    _apply_spec_metadata(spec, spec._parse_metadata(content))
+
+
+def _apply_spec_metadata(spec, metadata: Optional[dict]) -> None:
+    """Update spec from the metadata parsed from its file (if any).
+    """
+    from pulseox.specs import JOB_REPORT_SET
 
     if not metadata:
         spec.note = 'Failed to parse metadata'
-        logging.error(spec.note)
+        LOGGER.error('Failed to parse metadata for %s', spec.path)
         return
 
     # Determine report based on metadata and schedule
     metadata_report = metadata.get('report', '').upper()
 
-    if metadata_report in JOB_REPORT:
+    if metadata_report in JOB_REPORT_SET:
         spec.report = metadata_report
     else:  # Unknown report, treat as BAD
         spec.report = 'BAD'
         spec.note = f' report {metadata_report=} treated as bad'
-        logging.error(spec.note)
+        LOGGER.error('Report %r for %s treated as bad', metadata_report,
+                     spec.path)
 
     if metadata.get('note', None):
         spec.note = metadata.get('note')
@@ -0,0 +1,390 @@
+"""HTTP helpers shared by the GitHub modules of PulseOx.
+
+This module holds the pooled session, request headers, response caches
+and the JSON and base64 encoding used to talk to the GitHub REST API.
+See pulseox.github for the backend built on these.
+"""
+
+import binascii
+import collections
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional; install with the `fast` extra
+except ImportError:
+    orjson = None
+
+try:
+    import pybase64  # optional SIMD base64; install with the `fast` extra
+except ImportError:
+    pybase64 = None
+
+
+# Seconds to wait between retries of rate limited requests when GitHub
+# does not say how long to wait.
+RATE_LIMIT_BACKOFF = (1, 2, 4, 8)
+
+# Transient server errors retried by sessions from make_session. Only
+# reads are retried on these statuses (or read errors): a write (PUT of
+# contents, POST of blobs, trees or commits, PATCH of refs) may already
+# have taken effect when a 5xx comes back, and replaying a contents PUT
+# that GitHub applied fails with a 409 SHA conflict instead of reporting
+# success. urllib3 only retries writes on connection errors, where the
+# request never reached the server.
+RETRY_STATUSES = (500, 502, 503, 504)
+RETRY_METHODS = frozenset({'GET', 'HEAD'})
+
+
+def make_session(pool_connections: int = 4, pool_maxsize: int = 16,
+                 retries: int = 5, pool_block: bool = False
+                 ) -> requests.Session:
+    """Make a requests.Session with connection pooling and retries.
+
+    Reusing a session keeps the connection to the GitHub API alive so
+    back-to-back requests (e.g., the GET for a file SHA followed by the
+    PUT to update it) do not each pay for a new TCP+TLS handshake.
+
+    Args:
+        pool_connections: Number of per-host connection pools to cache
+        pool_maxsize: Maximum number of connections to keep in a pool
+        retries: Number of retries on connection errors, or for
+                 RETRY_METHODS on read errors or a status in
+                 RETRY_STATUSES (with exponential backoff and honoring
+                 any Retry-After header)
+        pool_block: If True, concurrent requests wait for a pooled
+                    connection instead of opening extra connections
+                    which are discarded afterwards
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+        pool_block=pool_block, max_retries=Retry(
+            total=retries, backoff_factor=0.5,
+            status_forcelist=RETRY_STATUSES, allowed_methods=RETRY_METHODS,
+            respect_retry_after_header=True, raise_on_status=False))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the module-level pooled session (created on first use).
+
+    Module-level functions and backends created without an explicit
+    session share this so that, e.g., the dashboard looking up many
+    specs reuses one set of keep-alive connections. The session is
+    created under a lock so threads starting at once (e.g., in
+    update_specs) do not each make their own.
+    """
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = make_session()
+    return _SESSION
+
+
+# Seconds to reuse a successful contents lookup made by
+# download_github_file or update_github_spec (0 disables). This helps
+# long running dashboards which regenerate often while most monitored
+# files rarely change. Writes made through GitHubBackend drop cached
+# lookups of the files they write.
+CONTENT_CACHE_TTL = float(os.environ.get('PULSEOX_CACHE_TTL', 0))
+CONTENT_CACHE_SIZE = 1024
+_content_cache: 'collections.OrderedDict[Tuple, Tuple[float, Any]]' = (
+    collections.OrderedDict())
+
+# Default media type for GitHub API responses, and the media type asking
+# the contents API for the raw file instead of JSON (JSON is only needed
+# where we want the file SHA).
+JSON_MEDIA_TYPE = 'application/vnd.github.v3+json'
+RAW_MEDIA_TYPE = 'application/vnd.github.raw+json'
+
+# Last 200 response (with its ETag) for each lookup made by cached_get
+# so repeat lookups can send If-None-Match. GitHub answers an unchanged
+# file with a bodyless 304 which does not count against rate limits.
+_etag_responses: 'collections.OrderedDict[Tuple, Tuple[str, Any]]' = (
+    collections.OrderedDict())
+
+# Guards _content_cache and _etag_responses which are shared by the
+# worker threads of dashboards and PulseOxClient.apost.
+_CACHE_LOCK = threading.Lock()
+
+
+def _cache_put(cache: collections.OrderedDict, key: Tuple,
+               value: Any) -> None:
+    """Store value in cache, dropping the least recently used entry.
+
+    The caller must hold _CACHE_LOCK.
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > CONTENT_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _token_digest(token: str) -> str:
+    """Return a hash of token to key caches with instead of the token."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def cached_get(url: str, token: str, params: Optional[dict] = None,
+               timeout: int = 30,
+               session: Optional[requests.Session] = None,
+               accept: Optional[str] = None
+               ) -> requests.Response:
+    """GET url with the shared session, reusing recent 200 responses.
+
+    Responses are reused for CONTENT_CACHE_TTL seconds and are keyed by
+    url, a hash of token, params and accept. Otherwise the request is made conditional on
+    the ETag of the last 200 response for the same key and that response
+    is returned again if GitHub answers 304 Not Modified. If session is
+    given it is used instead of the shared session. If accept is given
+    it replaces the default Accept header (e.g., to request a media type
+    such as RAW_MEDIA_TYPE).
+    """
+    key = (url, _token_digest(token),
+           tuple(sorted((params or {}).items())), accept)
+    with _CACHE_LOCK:
+        hit = _content_cache.get(key) if CONTENT_CACHE_TTL > 0 else None
+        if hit and time.monotonic() - hit[0] < CONTENT_CACHE_TTL:
+            _content_cache.move_to_end(key)
+            return hit[1]
+        validator = _etag_responses.get(key)
+    headers = get_headers(token, accept)
+    if validator:
+        headers = {**headers, "If-None-Match": validator[0]}
+    response = (session or get_session()).get(
+        url, headers=headers, params=params, timeout=timeout)
+    with _CACHE_LOCK:
+        if response.status_code == 304 and validator:
+            # Return the cached response as is (other threads may be
+            # reading it); a 304 does not count against the rate limit
+            # so its rate limit headers are at worst conservative.
+            response = validator[1]
+            if key in _etag_responses:
+                _etag_responses.move_to_end(key)
+        elif response.status_code == 200 and response.headers.get("ETag"):
+            _cache_put(_etag_responses, key,
+                       (response.headers["ETag"], response))
+        if CONTENT_CACHE_TTL > 0 and response.status_code == 200:
+            _cache_put(_content_cache, key, (time.monotonic(), response))
+    return response
+
+
+def forget_cached_contents(*urls: str) -> None:
+    """Drop lookups of the given contents URLs cached by cached_get."""
+    urls = set(urls)
+    with _CACHE_LOCK:
+        for key in [k for k in _content_cache if k[0] in urls]:
+            del _content_cache[key]
+
+
+def make_headers(token, media: str = JSON_MEDIA_TYPE):
+    """Make GitHub API headers.
+
+    Args:
+        token: GitHub personal access token
+        media: Media type to Accept (e.g., RAW_MEDIA_TYPE to get the
+               contents of a file as the body instead of base64 in JSON)
+
+    Returns:
+        Dictionary of headers for GitHub API requests
+
+    Raises:
+        ValueError: If token is empty
+    """
+    if not token:
+        raise ValueError('Must set token before interacting with GitHub')
+    return {"Authorization": f"token {token}", "Accept": media}
+
+
+# Headers from get_headers keyed by (token, accept, content_type). Note
+# that this keeps tokens in memory for the life of the process; entries
+# are dropped oldest first past HEADERS_CACHE_SIZE so long running
+# processes cycling through many tokens do not hold on to all of them.
+HEADERS_CACHE_SIZE = 64
+_HEADERS: Dict[Tuple[str, Optional[str], Optional[str]],
+               Dict[str, str]] = {}
+
+
+def get_headers(token: str, accept: Optional[str] = None,
+                content_type: Optional[str] = None) -> Dict[str, str]:
+    """Return make_headers(token), built once per token and shared.
+
+    This keeps header construction out of the per-request path (e.g.,
+    a dashboard makes a new backend for each spec it looks up). Callers
+    needing extra headers should copy rather than modify the result.
+
+    Args:
+        token: GitHub personal access token
+        accept: Optional media type to use in place of the default Accept
+        content_type: Optional Content-Type header to include
+    """
+    key = (token, accept, content_type)
+    headers = _HEADERS.get(key)
+    if headers is None:
+        headers = make_headers(token, accept or JSON_MEDIA_TYPE)
+        if content_type:
+            headers["Content-Type"] = content_type
+        if len(_HEADERS) >= HEADERS_CACHE_SIZE:
+            _HEADERS.pop(next(iter(_HEADERS)), None)
+        _HEADERS[key] = headers
+    return headers
+
+
+def rate_limit_wait(response: requests.Response,
+                    default: float = 1.0) -> Optional[float]:
+    """Return seconds to wait before retrying a rate limited response.
+
+    Args:
+        response: Response from the GitHub API
+        default: Wait to use if response is rate limited but does not
+                 say how long to wait
+
+    Returns:
+        None if response was not rate limited, otherwise the number of
+        seconds to wait (from Retry-After for secondary rate limits or
+        X-RateLimit-Reset when the primary rate limit is used up).
+    """
+    if response.status_code not in (403, 429):
+        return None
+    headers = response.headers
+    retry_after = headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            return default
+    if headers.get('X-RateLimit-Remaining') == '0':
+        try:
+            return max(0.0, float(headers['X-RateLimit-Reset'])
+                       - time.time())
+        except (KeyError, ValueError):
+            return default
+    if response.status_code == 429:
+        return default
+    return None  # a 403 for some other reason (e.g., permissions)
+
+
+# Marks a response we have not parsed yet in caches of parsed results
+# such as _PARSED_JSON here (and _PARSED_METADATA in pulseox.github).
+NOT_PARSED = object()
+
+# Parsed JSON body (see load_json) of responses, dropped with the
+# response.
+_PARSED_JSON: 'weakref.WeakKeyDictionary[Any, Any]' = (
+    weakref.WeakKeyDictionary())
+
+
+def remember(cache: weakref.WeakKeyDictionary, response: Any,
+             value: Any) -> None:
+    """Store value for response in cache (unless it cannot be weakly held).
+    """
+    try:
+        cache[response] = value
+    except TypeError:  # e.g., a response wrapper without weakref support
+        pass
+
+
+def dump_json(payload: Any) -> bytes:
+    """Serialize payload to JSON bytes for a request body.
+
+    Uses orjson when installed since it is much faster for the large
+    base64 strings in file uploads and produces bytes directly.
+    Otherwise falls back to the standard json module.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def load_json(response: requests.Response) -> Any:
+    """Parse the JSON body of a response.
+
+    Uses orjson on the raw bytes when installed, which skips the
+    encoding detection and text decode done by response.json().
+    The result is remembered for the response (in _PARSED_JSON) so
+    that responses served again from a cache (see cached_get) are only
+    parsed once; callers should treat it as read-only.
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    try:
+        data = _PARSED_JSON.get(response, NOT_PARSED)
+    except TypeError:  # not weakly referenceable so never remembered
+        data = NOT_PARSED
+    if data is NOT_PARSED:
+        data = orjson.loads(response.content) if orjson is not None else (
+            response.json())
+        remember(_PARSED_JSON, response, data)
+    return data
+
+
+def encode_content(content: Union[str, bytes]) -> str:
+    """Base64 encode text content for the GitHub API.
+
+    The intermediate UTF-8 bytes are released before the base64 text is
+    built so large files do not keep three full copies alive at once.
+    We use pybase64's SIMD encoder when installed and otherwise call
+    binascii directly rather than going through the wrappers in the
+    base64 module, and decode the result as ASCII (which is cheaper
+    than UTF-8 since base64 output is always ASCII).
+
+    Args:
+        content: Text content (or bytes to use as is) to encode
+
+    Returns:
+        Base64 encoded content as a string
+
+    Raises:
+        UnicodeEncodeError: If content cannot be encoded as UTF-8
+    """
+    raw = content if isinstance(content, bytes) else content.encode('utf-8')
+    encoded = pybase64.b64encode(raw) if pybase64 is not None else (
+        binascii.b2a_base64(raw, newline=False))
+    del raw
+    return encoded.decode('ascii')
+
+
+def file_content(response: requests.Response) -> Optional[bytes]:
+    """Return file bytes from a contents API response.
+
+    Requests made with RAW_MEDIA_TYPE get the file itself as the body.
+    If the server sent the usual JSON instead, the base64 content field
+    is decoded (with pybase64 when installed) and None is returned if
+    there is no content field.
+
+    Raises:
+        ValueError: If a JSON body cannot be parsed or decoded
+    """
+    if not response.headers.get('Content-Type', '').startswith(
+            'application/json'):
+        return response.content
+
+    data = load_json(response)  # server ignored the raw media type
+
+    # GitHub API returns file content as base64-encoded string
+    if "content" not in data:
+        return None
+    if pybase64 is not None:
+        return pybase64.b64decode(data["content"])
+    return binascii.a2b_base64(data["content"])
@@ -0,0 +1,565 @@
+"""Writing many files to GitHub in one commit for PulseOx.
+
+GitHubTreeMixin gives GitHubBackend (see pulseox.github) its
+write_github_tree method. Files are committed with the git data API
+(a tree, a commit and a ref update), with one contents PUT when only one
+file changed, or with a GraphQL createCommitOnBranch mutation.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+import hashlib
+import logging as rawLogger
+from typing import Dict, List, Optional, Tuple, Union
+
+import requests
+
+from pulseox.github_http import (encode_content, forget_cached_contents,
+                                 load_json)
+
+
+LOGGER = rawLogger.getLogger(__name__)
+
+# Files larger than this (in characters) are uploaded as separate blobs
+# rather than inline in the tree request, and at most MAX_BLOB_WORKERS
+# blob uploads run at once.
+MAX_INLINE_CONTENT = 1 << 20
+MAX_BLOB_WORKERS = 8
+
+# Number of trees whose entries _changed_files keeps (see _tree_blobs)
+MAX_CACHED_TREES = 4
+
+CREATE_COMMIT_MUTATION = (
+    'mutation($input: CreateCommitOnBranchInput!) {'
+    ' createCommitOnBranch(input: $input) { commit { oid } } }')
+
+
+def git_blob_sha(data: bytes) -> str:
+    """Return the git blob SHA (as GitHub reports for files) of data."""
+    sha = hashlib.sha1(b'blob %d\0' % len(data))
+    sha.update(data)
+    return sha.hexdigest()
+
+
+def blob_shas(files: List[Tuple[str, Union[str, bytes]]]
+               ) -> List[Optional[str]]:
+    """Return the git blob SHA of the content of each (path, content).
+
+    The SHA is None for text which cannot be encoded as UTF-8.
+    """
+    result = []
+    for _, content in files:
+        try:
+            raw = content if isinstance(content, bytes) else (
+                content.encode('utf-8'))
+        except UnicodeEncodeError:  # reported when writing
+            result.append(None)
+        else:
+            result.append(git_blob_sha(raw))
+    return result
+
+
+class GitHubTreeMixin:
+    """Methods of GitHubBackend for committing several files at once.
+
+    These use the request, caching and SHA bookkeeping of GitHubBackend
+    (e.g., self._request, self._commit_trees and self._latest_response)
+    so the mixin is only meant to be used as a base of that class.
+    """
+
+    def write_github_tree(
+        self,
+        owner: str,
+        repo: str,
+        files: List[Tuple[str, Union[str, bytes]]],
+        commit_message: str = 'Update files',
+        branch: str = 'main'
+    ) -> None:
+        """Write multiple files to GitHub in a single commit.
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+            files: List of (path, content) tuples where content is
+                   text or bytes (e.g., already UTF-8 encoded)
+            commit_message: Commit message for the update
+            branch: Branch name to commit to (default: 'main')
+
+        Raises:
+            ValidationError: If parameters are invalid
+            GitHubAPIError: If the API request fails
+        """
+        from pulseox.specs import ValidationError, GitHubAPIError, require_text
+
+        require_text(owner, 'owner')
+        require_text(repo, 'repo')
+        if not files:
+            raise ValidationError("files list cannot be empty")
+
+        if self.use_graphql:
+            self._write_github_tree_graphql(
+                owner, repo, files, commit_message, branch)
+            return
+
+        LOGGER.debug("Starting write_github_tree for %d files to %s/%s"
+                     " branch %s", len(files), owner, repo, branch)
+
+        # Hashing lots of content (to skip unchanged files below) is slow
+        # enough to be worth overlapping with the head and tree lookups.
+        hashing = None
+        if sum(len(content) for _, content in files) >= MAX_INLINE_CONTENT:
+            pool = ThreadPoolExecutor(max_workers=1)
+            hashing = pool.submit(blob_shas, files)
+            pool.shutdown(wait=False)
+
+        # Get the commit at the head of the branch from its ref (the
+        # commits endpoint would also give the tree SHA but sends the
+        # whole diff of the commit along with it).
+        head_url = (f"{self.base_url}/repos/{owner}/{repo}/git/ref/heads/"
+                    f"{branch}")
+        LOGGER.debug("Fetching branch reference from %s", head_url)
+
+        # Send the ETag from our last lookup so an unmoved branch costs a
+        # 304 (which does not count against the rate limit).
+        cached = self._etag_cache.get(head_url)
+        try:
+            head_response = self._request('GET', head_url, headers=(
+                {"If-None-Match": cached[0]} if cached else None))
+        except requests.RequestException as e:
+            LOGGER.error("Request exception getting branch reference: %s", e)
+            raise GitHubAPIError(f"Failed to get branch reference: {e}") from e
+
+        LOGGER.debug("Branch reference response: status=%s",
+                     head_response.status_code)
+        if head_response.status_code == 304 and cached:
+            base_commit_sha = cached[1]
+        elif head_response.status_code != 200:
+            LOGGER.error("Failed to get branch reference: %s",
+                         head_response.text)
+            raise GitHubAPIError(
+                "Failed to get branch reference"
+                f" (status {head_response.status_code}): {head_response.text}")
+        else:
+            try:
+                base_commit_sha = load_json(head_response)['object']['sha']
+            except (ValueError, KeyError, TypeError) as e:
+                LOGGER.error("Failed to parse branch reference: %s,"
+                             " response: %s", e, head_response.text)
+                raise GitHubAPIError(
+                    f"Failed to parse branch reference: {e}") from e
+            if head_response.headers.get("ETag"):
+                self._etag_cache[head_url] = (
+                    head_response.headers["ETag"], base_commit_sha)
+        LOGGER.debug("Base commit SHA: %s", base_commit_sha)
+
+        # Commits never change so we only look up the tree of a commit
+        # we have not seen (or made) before.
+        base_tree_sha = self._commit_trees.get(base_commit_sha)
+        if base_tree_sha is None:
+            base_tree_sha = self._fetch_commit_tree(
+                owner, repo, base_commit_sha)
+        LOGGER.debug("Base tree SHA: %s", base_tree_sha)
+
+        files, existing = self._changed_files(
+            owner, repo, base_tree_sha, files, hashing)
+        if not files:
+            LOGGER.debug('Skipping commit since no files changed')
+            return
+        if len(files) == 1 and existing is not None:
+            # A single changed file takes one contents PUT instead of
+            # the tree, commit, and ref requests below.
+            path, content = files[0]
+            self._put_tree_file(owner, repo, path, content,
+                                existing.get(path), commit_message, branch)
+            return
+
+        # Put file content inline in the tree entries so GitHub creates
+        # the blobs itself; this takes one request for the whole tree
+        # instead of one blob request per file. Large files are instead
+        # uploaded as blobs concurrently to keep the tree request small.
+        tree_items = []
+        large_files = []
+        for path, content in files:
+            require_text(path, 'file path')
+            item = {"path": path, "mode": "100644", "type": "blob"}
+            if isinstance(content, bytes) and (
+                    len(content) <= MAX_INLINE_CONTENT):
+                try:  # inline content must be text
+                    content = content.decode('utf-8')
+                except UnicodeDecodeError:
+                    pass
+            if len(content) > MAX_INLINE_CONTENT or isinstance(
+                    content, bytes):
+                large_files.append((item, content))
+            else:
+                try:
+                    content.encode('utf-8')
+                except UnicodeEncodeError as e:
+                    LOGGER.error("Failed to encode content for %s: %s",
+                                 path, e)
+                    raise ValidationError(
+                        f"Failed to encode content for {path}: {e}") from e
+                item["content"] = content
+            tree_items.append(item)
+
+        if len(large_files) == 1:  # no need for threads
+            item, content = large_files[0]
+            item["sha"] = self._create_blob(owner, repo, item["path"], content)
+        elif large_files:
+            with ThreadPoolExecutor(max_workers=min(
+                    len(large_files), MAX_BLOB_WORKERS)) as pool:
+                shas = pool.map(
+                    lambda pair: self._create_blob(
+                        owner, repo, pair[0]["path"], pair[1]),
+                    large_files)
+                for (item, _), sha in zip(large_files, shas):
+                    item["sha"] = sha
+
+        # Create tree
+        tree_url = f"{self.base_url}/repos/{owner}/{repo}/git/trees"
+        tree_payload = {
+            "base_tree": base_tree_sha,
+            "tree": tree_items
+        }
+
+        LOGGER.debug("Creating tree with %d items", len(tree_items))
+
+        try:
+            tree_response = self._request(
+                'POST', tree_url, json=tree_payload)
+        except requests.RequestException as e:
+            LOGGER.error("Request exception creating tree: %s", e)
+            raise GitHubAPIError(f"Failed to create tree: {e}") from e
+
+        LOGGER.debug("Tree response: status=%s", tree_response.status_code)
+        if tree_response.status_code != 201:
+            LOGGER.error("Failed to create tree: %s", tree_response.text)
+            raise GitHubAPIError(
+                f"Failed to create tree (status {tree_response.status_code}):"
+                f" {tree_response.text}")
+
+        try:
+            new_tree_sha = load_json(tree_response)['sha']
+            LOGGER.debug("New tree SHA: %s", new_tree_sha)
+        except (ValueError, KeyError) as e:
+            LOGGER.error("Failed to parse tree response: %s, response: %s",
+                         e, tree_response.text)
+            raise GitHubAPIError(f"Failed to parse tree response: {e}") from e
+
+        # Create commit
+        commit_url = f"{self.base_url}/repos/{owner}/{repo}/git/commits"
+        commit_payload = {
+            "message": commit_message,
+            "tree": new_tree_sha,
+            "parents": [base_commit_sha]
+        }
+
+        LOGGER.debug("Creating commit with message: %s", commit_message)
+
+        try:
+            new_commit_response = self._request(
+                'POST', commit_url, json=commit_payload)
+        except requests.RequestException as e:
+            LOGGER.error("Request exception creating commit: %s", e)
+            raise GitHubAPIError(f"Failed to create commit: {e}") from e
+
+        LOGGER.debug("Commit response: status=%s",
+                     new_commit_response.status_code)
+        if new_commit_response.status_code != 201:
+            LOGGER.error("Failed to create commit: %s",
+                         new_commit_response.text)
+            raise GitHubAPIError(
+                "Failed to create commit"
+                f" (status {new_commit_response.status_code}):"
+                f" {new_commit_response.text}")
+
+        try:
+            new_commit_sha = load_json(new_commit_response)['sha']
+            LOGGER.debug("New commit SHA: %s", new_commit_sha)
+            self._commit_trees[new_commit_sha] = new_tree_sha
+        except (ValueError, KeyError) as e:
+            LOGGER.error("Failed to parse commit response: %s, response: %s",
+                         e, new_commit_response.text)
+            raise GitHubAPIError(
+                f"Failed to parse commit response: {e}") from e
+
+        # Update reference
+        update_ref_payload = {
+            "sha": new_commit_sha,
+            "force": False
+        }
+
+        LOGGER.debug("Updating branch reference to %s", new_commit_sha)
+        ref_url = (f"{self.base_url}/repos/{owner}/{repo}/git/refs/heads/"
+                   f"{branch}")
+
+        try:
+            update_response = self._request(
+                'PATCH', ref_url, json=update_ref_payload)
+        except requests.RequestException as e:
+            LOGGER.error("Request exception updating reference: %s", e)
+            raise GitHubAPIError(f"Failed to update reference: {e}") from e
+
+        LOGGER.debug("Update reference response: status=%s",
+                     update_response.status_code)
+        if update_response.status_code not in (200, 201):
+            LOGGER.error("Failed to update reference: %s",
+                         update_response.text)
+            raise GitHubAPIError(
+                "Failed to update reference"
+                f" (status {update_response.status_code}):"
+                f" {update_response.text}")
+
+        LOGGER.debug("Successfully completed write_github_tree")
+        self._latest_response = update_response
+        self._forget_tree(owner, repo, files)
+
+    def _forget_tree(self, owner: str, repo: str,
+                     files: List[Tuple[str, Union[str, bytes]]]) -> None:
+        """Drop cached lookups (see cached_get) of files just written."""
+        forget_cached_contents(*[
+            f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
+            for path, _ in files])
+
+    def _fetch_commit_tree(self, owner: str, repo: str,
+                           commit_sha: str) -> str:
+        """Look up and remember the tree SHA of the given commit.
+
+        Raises:
+            GitHubAPIError: If the API request fails
+        """
+        from pulseox.specs import GitHubAPIError
+
+        commit_url = (f"{self.base_url}/repos/{owner}/{repo}/git/commits/"
+                      f"{commit_sha}")
+        LOGGER.debug("Fetching base commit from %s", commit_url)
+
+        try:
+            commit_response = self._request('GET', commit_url)
+        except requests.RequestException as e:
+            LOGGER.error("Request exception getting base commit: %s", e)
+            raise GitHubAPIError(f"Failed to get base commit: {e}") from e
+
+        LOGGER.debug("Base commit response: status=%s",
+                     commit_response.status_code)
+        if commit_response.status_code != 200:
+            LOGGER.error("Failed to get base commit: %s", commit_response.text)
+            raise GitHubAPIError(
+                "Failed to get base commit"
+                f" (status {commit_response.status_code}):"
+                f" {commit_response.text}")
+
+        try:
+            tree_sha = load_json(commit_response)['tree']['sha']
+        except (ValueError, KeyError) as e:
+            LOGGER.error("Failed to parse commit response: %s, response: %s",
+                         e, commit_response.text)
+            raise GitHubAPIError(
+                f"Failed to parse commit response: {e}") from e
+        self._commit_trees[commit_sha] = tree_sha
+        return tree_sha
+
+    def _changed_files(
+        self,
+        owner: str,
+        repo: str,
+        tree_sha: str,
+        files: List[Tuple[str, Union[str, bytes]]],
+        hashing: Optional[Future] = None
+    ) -> Tuple[List[Tuple[str, Union[str, bytes]]], Optional[Dict[str, str]]]:
+        """Return files whose content differs from those in tree_sha.
+
+        Blob SHAs are computed locally (see blob_shas) and compared to
+        the tree's entries so an update that changes nothing makes no
+        commit. The entries of recent trees are kept by tree SHA (in
+        self._tree_blobs) so repeat writes to an unmoved branch do not
+        look the tree up again. If nothing changed, self._latest_response
+        is set to the tree lookup response (None if the tree was cached).
+        If hashing is given, it is a Future for the result of
+        blob_shas(files) started earlier.
+
+        Returns:
+            Tuple of (changed, existing) where changed lists the files to
+            write and existing maps paths in the tree to their blob SHAs.
+            If the tree cannot be read, changed is all files and existing
+            is None.
+        """
+        response = None
+        existing = self._tree_blobs.get(tree_sha)
+        if existing is None:
+            url = (f"{self.base_url}/repos/{owner}/{repo}/git/trees/"
+                   f"{tree_sha}")
+            try:
+                response = self._request('GET', url,
+                                         params={'recursive': '1'})
+                tree = (load_json(response) if response.status_code == 200
+                        else {})
+            except (requests.RequestException, ValueError) as e:
+                LOGGER.warning('Unable to look up tree %s: %s', tree_sha, e)
+                return files, None
+            if tree.get('truncated') or 'tree' not in tree:
+                return files, None
+            existing = {entry.get('path'): entry.get('sha')
+                        for entry in tree['tree']}
+            self._tree_blobs[tree_sha] = existing
+            if len(self._tree_blobs) > MAX_CACHED_TREES:
+                self._tree_blobs.popitem(last=False)
+        else:
+            self._tree_blobs.move_to_end(tree_sha)
+        shas = hashing.result() if hashing is not None else blob_shas(files)
+        changed = [(path, content) for (path, content), sha in zip(files, shas)
+                   if sha is None or existing.get(path) != sha]
+        if not changed:
+            self._latest_response = response
+        return changed, existing
+
+    def _put_tree_file(self, owner: str, repo: str, path: str,
+                       content: Union[str, bytes], sha: Optional[str],
+                       commit_message: str, branch: str) -> None:
+        """Commit a single file to branch with the contents API.
+
+        Args:
+            owner: Repository owner
+            repo: Repository name
+            path: File path in repository
+            content: File content (text or bytes)
+            sha: Current blob SHA of path (None for a new file)
+            commit_message: Commit message for the update
+            branch: Branch name to commit to
+
+        Raises:
+            ValidationError: If parameters are invalid
+            GitHubAPIError: If the API request fails
+        """
+        from pulseox.specs import ValidationError, GitHubAPIError, require_text
+
+        require_text(path, 'file path')
+        try:
+            encoded_content = encode_content(content)
+        except UnicodeEncodeError as e:
+            raise ValidationError(
+                f"Failed to encode content for {path}: {e}") from e
+
+        payload = {"message": commit_message, "content": encoded_content,
+                   "branch": branch}
+        if sha:
+            payload["sha"] = sha
+        url = f"{self.base_url}/repos/{owner}/{repo}/contents/{path}"
+        response = self._put_contents(url, payload)
+        if response.status_code not in (200, 201):
+            LOGGER.error("Failed to write %s: %s", path, response.text)
+            raise GitHubAPIError(
+                f"Failed to write {path} (status {response.status_code}):"
+                f" {response.text}")
+        try:
+            commit = load_json(response)["commit"]
+            self._commit_trees[commit["sha"]] = commit["tree"]["sha"]
+        except (ValueError, KeyError, TypeError):
+            pass  # just means we look the tree up next time
+
+    def _create_blob(self, owner: str, repo: str, path: str,
+                     content: Union[str, bytes]) -> str:
+        """Upload content as a blob and return its SHA.
+
+        Raises:
+            ValidationError: If content cannot be encoded
+            GitHubAPIError: If the API request fails
+        """
+        from pulseox.specs import ValidationError, GitHubAPIError
+
+        LOGGER.debug('Creating blob for %s (%d bytes)', path, len(content))
+        try:
+            encoded_content = encode_content(content)
+        except UnicodeEncodeError as e:
+            raise ValidationError(
+                f"Failed to encode content for {path}: {e}") from e
+
+        blob_url = f"{self.base_url}/repos/{owner}/{repo}/git/blobs"
+        try:
+            blob_response = self._request('POST', blob_url, json={
+                "content": encoded_content, "encoding": "base64"})
+        except requests.RequestException as e:
+            raise GitHubAPIError(
+                f"Failed to create blob for {path}: {e}") from e
+
+        if blob_response.status_code != 201:
+            raise GitHubAPIError(
+                f"Failed to create blob for {path}"
+                f" (status {blob_response.status_code}): {blob_response.text}")
+        try:
+            return load_json(blob_response)['sha']
+        except (ValueError, KeyError) as e:
+            raise GitHubAPIError(
+                f"Failed to parse blob response for {path}: {e}") from e
+
+    def _write_github_tree_graphql(
+        self,
+        owner: str,
+        repo: str,
+        files: List[Tuple[str, Union[str, bytes]]],
+        commit_message: str,
+        branch: str
+    ) -> None:
+        """Write files in one commit with createCommitOnBranch.
+
+        This takes two requests no matter how many files there are: one
+        to get the branch head (GitHub requires it as expectedHeadOid so
+        concurrent updates are not lost) and the mutation itself.
+
+        Raises:
+            ValidationError: If parameters are invalid
+            GitHubAPIError: If the API request fails
+        """
+        from pulseox.specs import ValidationError, GitHubAPIError, require_text
+
+        # The singular ref endpoint (as in write_github_tree) gives only
+        # the exact branch instead of every ref matching it as a prefix.
+        ref_url = (f"{self.base_url}/repos/{owner}/{repo}/git/ref/heads/"
+                   f"{branch}")
+        try:
+            ref_response = self._request('GET', ref_url)
+        except requests.RequestException as e:
+            raise GitHubAPIError(f"Failed to get branch reference: {e}") from e
+        if ref_response.status_code != 200:
+            raise GitHubAPIError(
+                "Failed to get branch reference"
+                f" (status {ref_response.status_code}): {ref_response.text}")
+        try:
+            head_oid = load_json(ref_response)['object']['sha']
+        except (ValueError, KeyError, TypeError) as e:
+            raise GitHubAPIError(
+                f"Failed to parse branch reference: {e}") from e
+
+        additions = []
+        for path, content in files:
+            require_text(path, 'file path')
+            try:
+                additions.append({"path": path,
+                                  "contents": encode_content(content)})
+            except UnicodeEncodeError as e:
+                raise ValidationError(
+                    f"Failed to encode content for {path}: {e}") from e
+
+        variables = {"input": {
+            "branch": {"repositoryNameWithOwner": f"{owner}/{repo}",
+                       "branchName": branch},
+            "message": {"headline": commit_message},
+            "fileChanges": {"additions": additions},
+            "expectedHeadOid": head_oid}}
+
+        LOGGER.debug('Creating commit for %d files with GraphQL', len(files))
+        try:
+            response = self._request('POST', self.graphql_url(), json={
+                "query": CREATE_COMMIT_MUTATION, "variables": variables})
+        except requests.RequestException as e:
+            raise GitHubAPIError(f"Failed to create commit: {e}") from e
+
+        self._latest_response = response
+        try:  # GraphQL reports most errors with status 200
+            errors = load_json(response).get('errors')
+        except (ValueError, AttributeError):
+            errors = response.text
+        if response.status_code != 200 or errors:
+            raise GitHubAPIError(
+                f"Failed to create commit (status {response.status_code}):"
+                f" {errors or response.text}")
+        self._forget_tree(owner, repo, files)
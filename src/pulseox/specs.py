@@ -2,6 +2,9 @@
 """
 
 from datetime import datetime, timedelta, timezone
+import copy
+import functools
+import sys
 from typing import Optional, Union, Annotated, Literal
 import re
 
@@ -14,11 +17,25 @@ from pulseox.generic_backend import make_backend
 
 VALID_MODES = {'md', 'org'}
 VALID_STATUSES = ('ERROR', 'MISSING', 'OK')
+VALID_STATUS_SET = frozenset(VALID_STATUSES)  # For fast membership tests
 
 JOB_REPORT = ('GOOD', 'BAD', 'NOT_REPORTED')
+JOB_REPORT_SET = frozenset(JOB_REPORT)  # For fast membership tests
 
 DEFAULT_BASE_URL = "https://api.github.com"
 
+# Metadata section header keyed by file extension (markdown by default).
+_METADATA_HEADERS = {'md': '# Metadata', 'org': '* Metadata'}
+_DEFAULT_METADATA_HEADER = '# Metadata'
+
+# Metadata section of a file and the "- key: value" lines within it
+# (compiled once since every spec lookup parses a file). Keys end at the
+# first ': ' and surrounding whitespace on a line is ignored.
+_METADATA_RE = re.compile(
+    r'(?:^|\n)(?:#|\*) Metadata\n(.*?)(?:\n(?:#|\*)|$)', re.DOTALL)
+_METADATA_LINE_RE = re.compile(
+    r'^[^\S\n]*- (.*?): ([^\S\n]*\S.*?)[^\S\n]*$', re.MULTILINE)
+
 COMMON_TIMEZONES = {
     tz: timezone(timedelta(hours=offset))
     for tz, offset in [
@@ -28,15 +45,79 @@ COMMON_TIMEZONES = {
 }
 
 
+# Timestamps as written by create_metadata, e.g., '2024-01-02 03:04 EST'
+_METADATA_DT_RE = re.compile(
+    r'(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}) ([A-Z]{3})')
+
+
+@functools.lru_cache(maxsize=4096)
 def parse_dt(value):
-    """Parse a datetime string, understanding common US timezone names."""
+    """Parse a datetime string, understanding common US timezone names.
+
+    Results are cached since dateutil is slow and the same `updated`
+    strings are parsed on every summary (datetimes are immutable so
+    sharing them is safe). Timestamps in the format create_metadata
+    writes and ISO 8601 timestamps are parsed directly; anything else
+    goes through dateutil.
+    """
+    match = _METADATA_DT_RE.fullmatch(value)
+    if match and match.group(6) in COMMON_TIMEZONES:
+        return datetime(*map(int, match.groups()[:5]),
+                        tzinfo=COMMON_TIMEZONES[match.group(6)])
+    try:  # Python < 3.11 fromisoformat does not accept a Z suffix
+        return datetime.fromisoformat(
+            value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        pass
     dt = dateparser.parse(value, tzinfos=COMMON_TIMEZONES)
     return dt
 
 
+@functools.lru_cache(maxsize=256)
+def parse_cron(schedule: str) -> croniter:
+    """Parse cron `schedule` once (callers must copy the result).
+
+    Raises:
+        ValueError: If schedule is not a valid cron string
+    """
+    return croniter(schedule)
+
+
+def next_cron_run(schedule: str, start: datetime) -> datetime:
+    """Return the first time after start matching cron `schedule`.
+
+    Cached since specs are checked against the same (schedule, last
+    update) pair on every summary. Aware datetimes for the same instant
+    hash equal whatever their timezone, but cron fields are matched in
+    the timezone of start, so the zone is part of the cache key.
+    """
+    return _next_cron_run(schedule, start.isoformat(), str(start.tzinfo),
+                          start)
+
+
+@functools.lru_cache(maxsize=4096)
+def _next_cron_run(schedule: str, start_iso: str, zone: str,
+                   start: datetime) -> datetime:
+    """Cached worker for next_cron_run (start_iso and zone are the key).
+
+    New keys copy the parsed schedule from parse_cron rather than
+    parsing the cron string again (a copy since croniter objects track
+    their current time).
+    """
+    del start_iso, zone  # only used as part of the cache key
+    cron = copy.copy(parse_cron(schedule))
+    cron.set_current(start, force=True)
+    return cron.get_next(datetime)
+
+
+@functools.lru_cache(maxsize=32)
 def make_dt_formatter(show_tz, fmt='%Y-%m-%d %H:%M %Z'):
     """Return a function formatting datetimes in the `show_tz` timezone.
 
+    Formatters are cached so that repeated calls with the same
+    `show_tz` and `fmt` (e.g., once per post) share one formatter
+    instead of looking up the timezone each time.
+
     Args:
         show_tz: String name of a timezone (e.g., 'US/Eastern').
         fmt:     strftime format string for the output.
@@ -47,16 +128,18 @@ def make_dt_formatter(show_tz, fmt='%Y-%m-%d %H:%M %Z'):
     """
     tzinfo = pytz.timezone(show_tz)
 
+    @functools.lru_cache(maxsize=1024)
+    def format_text(value: str) -> str:
+        return parse_dt(value).astimezone(tzinfo).strftime(fmt)
+
     def format_dt(value: Union[str, datetime]):
+        if isinstance(value, datetime):  # common case: no parsing needed
+            return value.astimezone(tzinfo).strftime(fmt)
         if value in (None, '', 'N/A', 'NA'):
             return str(value)
         if isinstance(value, str):
-            value = parse_dt(value)
-        elif isinstance(value, datetime):
-            pass
-        else:
-            raise ValueError(f'Bad type for {value=}')
-        return value.astimezone(tzinfo).strftime(fmt)
+            return format_text(value)
+        raise ValueError(f'Bad type for {value=}')
     return format_dt
 
 
@@ -101,23 +184,16 @@ def create_metadata(
     Returns:
         Formatted metadata string
     """
-    timestamp = make_dt_formatter(show_tz)(
-        datetime.now(timezone.utc).isoformat())
+    timestamp = make_dt_formatter(show_tz)(datetime.now(timezone.utc))
 
-    if path_to_file.endswith('.md'):
-        header = "# Metadata"
-    elif path_to_file.endswith('.org'):
-        header = "* Metadata"
-    else:
-        # Default to markdown for unknown extensions
-        header = "# Metadata"
+    header = _METADATA_HEADERS.get(path_to_file.rpartition('.')[2],
+                                   _DEFAULT_METADATA_HEADER)
 
     metadata_lines = [
         header,
         f"- report: {report}",
         f"- updated: {timestamp}",
     ]
-
     if note:
         metadata_lines.append(f"- note: {note}")
 
@@ -137,6 +213,25 @@ class GitHubAPIError(PulseOxError):
     """Exception raised for GitHub API errors."""
 
 
+def require_text(value: Optional[str], name: str,
+                 allow_none: bool = False) -> None:
+    """Check that a string parameter is not empty or only whitespace.
+
+    Args:
+        value: Value to check
+        name: Parameter name to use in the error message
+        allow_none: Whether None is acceptable (e.g., the owner of a
+                    local git repo)
+
+    Raises:
+        ValidationError: If value is empty or only whitespace
+    """
+    if value is None and allow_none:
+        return
+    if not value or value.isspace():
+        raise ValidationError(f"{name} cannot be empty")
+
+
 class PulseOxSpec(BaseModel):
     """Specification for a monitored file in a repository.
 
@@ -170,6 +265,30 @@ class PulseOxSpec(BaseModel):
             'What the job reports as its state.'))]
     updated: Optional[str] = None
 
+    @field_validator('schedule')
+    @classmethod
+    def _check_schedule(cls, value):
+        """Verify that a cron string schedule parses (and cache the parse)."""
+        if isinstance(value, str):
+            try:
+                parse_cron(value)  # raises ValueError if invalid
+            except KeyError as e:  # croniter raises this for some fields
+                raise ValueError(
+                    f'Invalid cron schedule {value!r}: {e}') from e
+            return sys.intern(value)
+        return value
+
+    @field_validator('owner', 'repo', 'report')
+    @classmethod
+    def _intern_shared_text(cls, value):
+        """Intern text which is usually the same for many specs.
+
+        Specs loaded from JSON otherwise each get their own copy of the
+        owner, repo and report strings which adds up for dashboards
+        monitoring thousands of files.
+        """
+        return sys.intern(value) if value is not None else value
+
     @field_validator('grace_period')
     @classmethod
     def _check_grace_period(cls, value):
@@ -181,22 +300,59 @@ class PulseOxSpec(BaseModel):
 
     def update(self, token: Optional[str] = None,
                base_url: str = "https://api.github.com",
-               git_executable: str = "/usr/bin/git"):
+               git_executable: str = "/usr/bin/git",
+               session=None):
         """Update report from backend (GitHub or local git).
 
         Args:
             token: GitHub personal access token (required for GitHub backend)
             base_url: GitHub API base URL
             git_executable: Path to git executable (for local git backend)
+            session: Optional requests.Session to reuse (for GitHub backend)
         """
         backend = make_backend(
             self.owner, self.repo,
             token=token or '',
             base_url=base_url,
-            git_executable=git_executable
+            git_executable=git_executable,
+            session=session
         )
         backend.update_spec(self)
 
+    @classmethod
+    def update_many(cls, specs: list, token: Optional[str] = None,
+                    base_url: str = "https://api.github.com",
+                    git_executable: str = "/usr/bin/git",
+                    session=None, use_graphql: bool = True,
+                    max_workers: Optional[int] = None) -> None:
+        """Update reports for many specs, batching GitHub lookups.
+
+        Specs on GitHub are read with GraphQL queries covering many
+        files of a repository at once (see GitHubBackend.update_specs)
+        instead of one request per spec. Lookups which are not batched
+        (e.g., if use_graphql is False) and updates of specs for local
+        git repos run concurrently in threads; requests sessions (and
+        the shared session by default) are safe to use from threads.
+        See generic_backend.update_many_specs which does the work.
+
+        Args:
+            specs: PulseOxSpec instances to update
+            token: GitHub personal access token (required for GitHub specs)
+            base_url: GitHub API base URL
+            git_executable: Path to git executable (for local git backend)
+            session: Optional requests.Session to reuse (for GitHub backend)
+            use_graphql: Whether to batch GitHub lookups with GraphQL
+            max_workers: Maximum number of lookups to run at once
+                         (default: pulseox.github.MAX_SPEC_WORKERS)
+        """
+        # Imported here so importing specs does not pull in update_many's
+        # dependencies (and their lazy imports of specs) at module load.
+        from pulseox.generic_backend import update_many_specs
+
+        update_many_specs(specs, token=token, base_url=base_url,
+                          git_executable=git_executable, session=session,
+                          use_graphql=use_graphql, max_workers=max_workers)
+
     def _parse_metadata(self, content: str) -> Optional[dict]:
         """Parse metadata from file content.
 
@@ -206,28 +362,15 @@ class PulseOxSpec(BaseModel):
         Returns:
             Dictionary of metadata or None
         """
-        metadata = {}
-
         # Look for metadata section
-        md_match = re.search(
-            r'(?:^|\n)(?:#|\*) Metadata\n(.*?)(?:\n(?:#|\*)|$)',
-            content,
-            re.DOTALL
-        )
+        md_match = _METADATA_RE.search(content)
 
         if not md_match:
             return None
 
-        metadata_text = md_match.group(1)
-
-        # Parse metadata fields
-        for line in metadata_text.split('\n'):
-            line = line.strip()
-            if line.startswith('- '):
-                line = line[2:]
-                if ': ' in line:
-                    key, value = line.split(': ', 1)
-                    metadata[key] = value
+        # Parse metadata fields in place (without copying the section)
+        metadata = dict(_METADATA_LINE_RE.findall(
+            content, md_match.start(1), md_match.end(1)))
 
         return metadata if metadata else None
 
@@ -236,6 +379,7 @@ class PulseOxSpec(BaseModel):
         updated_str: Optional[str] = None,
         schedule: Optional[Union[timedelta, str]] = None,
         grace_period: Optional[timedelta] = None,
+        now: Optional[datetime] = None,
     ) -> bool:
         """Check if update time is within the schedule.
 
@@ -246,6 +390,9 @@ class PulseOxSpec(BaseModel):
                           If set (on self or here), the item is still
                           considered within schedule until the grace
                           period has passed beyond the scheduled deadline.
+            now: Optional timezone-aware current time (default: the
+                 actual current time). Pass one time when checking many
+                 specs so they are all judged at the same moment.
 
         Returns:
             True if within schedule (including any grace period),
@@ -268,7 +415,7 @@ class PulseOxSpec(BaseModel):
             # Assume UTC if no timezone
             updated = updated.replace(tzinfo=timezone.utc)
 
-        now = datetime.now(timezone.utc)
+        now = now or datetime.now(timezone.utc)
 
         # For timedelta schedules
         if isinstance(schedule, timedelta):
@@ -277,8 +424,7 @@ class PulseOxSpec(BaseModel):
             # For cron strings, calculate next expected run time
             # based on the last update
             try:
-                cron = croniter(schedule, updated)
-                next_run = cron.get_next(datetime)
+                next_run = next_cron_run(schedule, updated)
                 # If we're past the next expected run (plus any grace
                 # period), it's missing
                 return now <= (next_run + grace_period)
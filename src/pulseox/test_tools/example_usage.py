@@ -30,19 +30,20 @@ def example_basic_usage():
             base_url = server.get_base_url()
             print(f"Server running at: {base_url}")
 
-            headers = {
+            # One session for all requests so they share a connection
+            session = requests.Session()
+            session.headers.update({
                 "Authorization": "token test-token-123",
                 "Accept": "application/vnd.github.v3+json"
-            }
+            })
 
             # Example 1: Create a file
             print("\n1. Creating a file...")
             content = "Hello, World!".encode()
             encoded = base64.b64encode(content).decode()
 
-            response = requests.put(
+            response = session.put(
                 f"{base_url}/repos/owner/repo/contents/hello.txt",
-                headers=headers,
                 json={
                     "message": "Add hello.txt",
                     "content": encoded
@@ -56,9 +57,8 @@ def example_basic_usage():
 
             # Example 2: Read the file back
             print("\n2. Reading the file...")
-            response = requests.get(
-                f"{base_url}/repos/owner/repo/contents/hello.txt",
-                headers=headers
+            response = session.get(
+                f"{base_url}/repos/owner/repo/contents/hello.txt"
             )
             print(f"   Status: {response.status_code}")
             retrieved_content = base64.b64decode(
@@ -72,9 +72,8 @@ def example_basic_usage():
             new_encoded = base64.b64encode(new_content).decode()
             file_sha = response.json()["sha"]
 
-            response = requests.put(
+            response = session.put(
                 f"{base_url}/repos/owner/repo/contents/hello.txt",
-                headers=headers,
                 json={
                     "message": "Update hello.txt",
                     "content": new_encoded,
@@ -131,16 +130,17 @@ def example_git_tree_api():
             repo_root=temp_dir
         ) as server:
             base_url = server.get_base_url()
-            headers = {
+            # One session for all requests so they share a connection
+            session = requests.Session()
+            session.headers.update({
                 "Authorization": "token test-token",
                 "Accept": "application/vnd.github.v3+json"
-            }
+            })
 
             # Step 1: Get current branch ref
             print("\n1. Getting branch reference...")
-            response = requests.get(
-                f"{base_url}/repos/owner/repo/git/refs/heads/main",
-                headers=headers
+            response = session.get(
+                f"{base_url}/repos/owner/repo/git/refs/heads/main"
             )
             print(f"   Status: {response.status_code}")
             current_commit = response.json()["object"]["sha"]
@@ -148,9 +148,8 @@ def example_git_tree_api():
 
             # Step 2: Get commit to get base tree
             print("\n2. Getting commit details...")
-            response = requests.get(
-                f"{base_url}/repos/owner/repo/git/commits/{current_commit}",
-                headers=headers
+            response = session.get(
+                f"{base_url}/repos/owner/repo/git/commits/{current_commit}"
             )
             base_tree = response.json()["tree"]["sha"]
             print(f"   Base tree: {base_tree}")
@@ -164,9 +163,8 @@ def example_git_tree_api():
                 ("file3.txt", "Content 3")
             ]:
                 encoded = base64.b64encode(content.encode()).decode()
-                response = requests.post(
+                response = session.post(
                     f"{base_url}/repos/owner/repo/git/blobs",
-                    headers=headers,
                     json={
                         "content": encoded,
                         "encoding": "base64"
@@ -186,9 +184,8 @@ def example_git_tree_api():
                 }
                 for filename, sha in blobs.items()
             ]
-            response = requests.post(
+            response = session.post(
                 f"{base_url}/repos/owner/repo/git/trees",
-                headers=headers,
                 json={
                     "base_tree": base_tree,
                     "tree": tree_entries
@@ -202,9 +199,8 @@ def example_git_tree_api():
 
             # Step 5: Create commit
             print("\n5. Creating commit...")
-            response = requests.post(
+            response = session.post(
                 f"{base_url}/repos/owner/repo/git/commits",
-                headers=headers,
                 json={
                     "message": "Add multiple files",
                     "tree": new_tree,
@@ -216,9 +212,8 @@ def example_git_tree_api():
 
             # Step 6: Update branch reference
             print("\n6. Updating branch reference...")
-            response = requests.patch(
+            response = session.patch(
                 f"{base_url}/repos/owner/repo/git/refs/heads/main",
-                headers=headers,
                 json={
                     "sha": new_commit,
                     "force": False
@@ -230,9 +225,8 @@ def example_git_tree_api():
             # Verify files exist
             print("\n7. Verifying files exist...")
             for filename in blobs.keys():
-                response = requests.get(
-                    f"{base_url}/repos/owner/repo/contents/{filename}",
-                    headers=headers
+                response = session.get(
+                    f"{base_url}/repos/owner/repo/contents/{filename}"
                 )
                 if response.status_code == 200:
                     print(f"   ✓ {filename} exists")
@@ -8,6 +8,7 @@ import base64
 import hashlib
 import json
 import os
+import re
 import socket
 import subprocess
 import threading
@@ -16,7 +17,7 @@ from pathlib import Path
 from typing import List, Optional, Dict, Any
 from wsgiref.simple_server import make_server, WSGIServer
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 
 
 
@@ -191,7 +192,9 @@ class MockGitHubServer:
             return self._handle_put_contents(owner, repo, path)
 
         # Route: GET /repos/{owner}/{repo}/git/refs/heads/{branch}
+        # (and the singular /git/ref/heads/{branch} form GitHub documents)
         @self.app.route("/repos/<owner>/<repo>/git/refs/heads/<branch>", methods=["GET"])
+        @self.app.route("/repos/<owner>/<repo>/git/ref/heads/<branch>", methods=["GET"])
         def get_ref(owner, repo, branch):
             """Get a branch reference."""
             return self._handle_get_ref(owner, repo, branch)
@@ -214,6 +217,12 @@ class MockGitHubServer:
             """Create a blob object."""
             return self._handle_create_blob(owner, repo)
 
+        # Route: GET /repos/{owner}/{repo}/git/trees/{sha}
+        @self.app.route("/repos/<owner>/<repo>/git/trees/<sha>", methods=["GET"])
+        def get_tree(owner, repo, sha):
+            """Get a tree object."""
+            return self._handle_get_tree(owner, repo, sha)
+
         # Route: POST /repos/{owner}/{repo}/git/trees
         @self.app.route("/repos/<owner>/<repo>/git/trees", methods=["POST"])
         def create_tree(owner, repo):
@@ -226,6 +235,12 @@ class MockGitHubServer:
             """Create a commit object."""
             return self._handle_create_commit(owner, repo)
 
+        # Route: POST /graphql (only createCommitOnBranch is supported)
+        @self.app.route("/graphql", methods=["POST"])
+        def graphql():
+            """Run a GraphQL mutation."""
+            return self._handle_graphql()
+
     def _handle_get_contents(self, owner: str, repo: str, path: str):
         """Handle GET /repos/{owner}/{repo}/contents/{path}.
 
@@ -245,14 +260,22 @@ class MockGitHubServer:
         if result.returncode != 0:
             return jsonify({
                 "message": "Not Found",
-                "documentation_url": "https://docs.github.com/rest/reference/repos#get-repository-content"
+                "documentation_url": ("https://docs.github.com/rest/reference"
+                                      "/repos#get-repository-content")
             }), 404
 
         content = result.stdout.encode()
-        encoded_content = base64.b64encode(content).decode()
         sha = self._compute_sha(content)
 
-        return jsonify({
+        if "vnd.github.raw" in request.headers.get("Accept", ""):
+            # Raw media type: the body is the file itself
+            response = Response(
+                content, mimetype="application/vnd.github.raw+json")
+            response.set_etag(sha)
+            return response.make_conditional(request)
+
+        encoded_content = base64.b64encode(content).decode()
+        response = jsonify({
             "name": os.path.basename(path),
             "path": path,
             "sha": sha,
@@ -263,7 +286,10 @@ class MockGitHubServer:
             "url": f"http://localhost/repos/{owner}/{repo}/contents/{path}",
             "html_url": f"http://localhost/{owner}/{repo}/blob/main/{path}",
             "download_url": f"http://localhost/{owner}/{repo}/raw/main/{path}"
-        }), 200
+        })
+        # Like GitHub, send an ETag and honor If-None-Match with a 304
+        response.set_etag(sha)
+        return response.make_conditional(request)
 
     def _handle_put_contents(self, owner: str, repo: str, path: str):
         """Handle PUT /repos/{owner}/{repo}/contents/{path}.
@@ -280,6 +306,19 @@ class MockGitHubServer:
                 "message": "Invalid request: missing required fields"
             }), 400
 
+        # Like GitHub, require the current blob SHA to update a file
+        existing = self._git("show", f"HEAD:{path}", check=False)
+        if existing.returncode == 0:
+            current_sha = self._compute_sha(existing.stdout.encode())
+            if "sha" not in data:
+                return jsonify({
+                    "message": 'Invalid request.\n\n"sha" wasn\'t supplied.'
+                }), 422
+            if data["sha"] != current_sha:
+                return jsonify({
+                    "message": f"{path} does not match {data['sha']}"
+                }), 409
+
         # Decode content
         try:
             content = base64.b64decode(data["content"])
@@ -360,7 +399,7 @@ class MockGitHubServer:
 
         commit_sha = result.stdout.strip()
 
-        return jsonify({
+        response = jsonify({
             "ref": f"refs/heads/{branch}",
             "node_id": "mock_node_id",
             "url": f"http://localhost/repos/{owner}/{repo}/git/refs/heads/{branch}",
@@ -369,7 +408,10 @@ class MockGitHubServer:
                 "type": "commit",
                 "url": f"http://localhost/repos/{owner}/{repo}/git/commits/{commit_sha}"
             }
-        }), 200
+        })
+        # Like GitHub, send an ETag and honor If-None-Match with a 304
+        response.set_etag(commit_sha)
+        return response.make_conditional(request)
 
     def _handle_patch_ref(self, owner: str, repo: str, branch: str):
         """Handle PATCH /repos/{owner}/{repo}/git/refs/heads/{branch}."""
@@ -524,6 +566,30 @@ class MockGitHubServer:
                 "message": f"Failed to create blob: {str(e)}"
             }), 500
 
+    def _handle_get_tree(self, owner: str, repo: str, sha: str):
+        """Handle GET /repos/{owner}/{repo}/git/trees/{sha}."""
+        args = ["ls-tree", "-r", sha] if request.args.get(
+            "recursive") else ["ls-tree", sha]
+        result = self._git(*args, check=False)
+        if result.returncode != 0:
+            return jsonify({"message": "Not Found"}), 404
+
+        entries = []
+        for line in result.stdout.splitlines():
+            info, path = line.split('\t', 1)
+            mode, obj_type, obj_sha = info.split()
+            entries.append({
+                "path": path, "mode": mode, "type": obj_type,
+                "sha": obj_sha,
+                "url": f"http://localhost/repos/{owner}/{repo}/git/{obj_type}s/{obj_sha}"
+            })
+        return jsonify({
+            "sha": sha,
+            "url": f"http://localhost/repos/{owner}/{repo}/git/trees/{sha}",
+            "tree": entries,
+            "truncated": False
+        }), 200
+
     def _handle_create_tree(self, owner: str, repo: str):
         """Handle POST /repos/{owner}/{repo}/git/trees."""
         data = request.get_json()
@@ -543,8 +609,13 @@ class MockGitHubServer:
             for entry in tree_entries:
                 mode = entry.get("mode", "100644")
                 obj_type = entry.get("type", "blob")
-                sha = entry["sha"]
                 path = entry["path"]
+                if entry.get("sha") is None and "content" in entry:
+                    # Inline content: create the blob like GitHub does
+                    entry["sha"] = self._git(
+                        "hash-object", "-w", "--stdin",
+                        input=entry["content"]).stdout.strip()
+                sha = entry["sha"]
                 tree_input.append(f"{mode} {obj_type} {sha}\t{path}")
 
             # If base_tree is provided, we need to read it first and merge
@@ -661,6 +732,57 @@ class MockGitHubServer:
                 "message": f"Failed to create commit: {str(e)}"
             }), 500
 
+    def _handle_graphql(self):
+        """Handle POST /graphql.
+
+        Supports the createCommitOnBranch mutation and queries reading
+        files as repository objects (aliased `object(expression: $var)`
+        fields as made by pulseox.github.spec_files_query). Like GitHub,
+        errors are reported in an "errors" list with a 200 status code.
+        """
+        data = request.get_json()
+        if data and "repository(" in data.get("query", ""):
+            return self._handle_graphql_objects(data)
+        if not data or "createCommitOnBranch" not in data.get("query", ""):
+            return jsonify({"errors": [{"message": (
+                "Only createCommitOnBranch and object queries"
+                " are supported")}]}), 200
+
+        info = data.get("variables", {}).get("input", {})
+        branch = info.get("branch", {}).get("branchName", "main")
+        head = self._git("rev-parse", f"refs/heads/{branch}",
+                         check=False).stdout.strip()
+        if info.get("expectedHeadOid") != head:
+            return jsonify({"errors": [{
+                "message": f"Expected branch to point to"
+                f" \"{info.get('expectedHeadOid')}\" but it did not"}]}), 200
+
+        try:
+            for item in info.get("fileChanges", {}).get("additions", []):
+                absolute_file_path = self.repo_root / item["path"]
+                absolute_file_path.parent.mkdir(parents=True, exist_ok=True)
+                absolute_file_path.write_bytes(
+                    base64.b64decode(item["contents"]))
+                self._git("add", item["path"])
+            self._git("commit", "-m", info["message"]["headline"])
+            oid = self._git("rev-parse", "HEAD").stdout.strip()
+        except (RuntimeError, KeyError) as e:
+            return jsonify({"errors": [{"message": str(e)}]}), 200
+
+        return jsonify({"data": {
+            "createCommitOnBranch": {"commit": {"oid": oid}}}}), 200
+
+    def _handle_graphql_objects(self, data):
+        """Answer a query for file objects in a repository."""
+        variables = data.get("variables", {})
+        objects = {}
+        for alias, var in re.findall(r'(\w+): object\(expression: \$(\w+)\)',
+                                     data["query"]):
+            result = self._git("show", variables.get(var, ""), check=False)
+            objects[alias] = None if result.returncode != 0 else {
+                "text": result.stdout, "isTruncated": False}
+        return jsonify({"data": {"repository": objects}}), 200
+
     @staticmethod
     def get_free_port():
         sock = socket.socket()
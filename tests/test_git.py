@@ -180,6 +180,16 @@ class TestGit:
         finally:
             GitBackend.model_fields['auto_push'].default = original_auto_push
 
+    def test_dt_formatter_accepts_datetime(self):
+        """Test formatting a datetime matches formatting its ISO string."""
+        from datetime import datetime as dt, timezone
+        from pulseox.specs import make_dt_formatter
+
+        format_dt = make_dt_formatter('US/Eastern')
+        when = dt(2024, 7, 1, 16, 30, 15, tzinfo=timezone.utc)
+        assert format_dt(when) == format_dt(when.isoformat())
+        assert format_dt(when) == '2024-07-01 12:30 EDT'
+
     def test_spec_update(self):
         """Test PulseOxSpec update with local git backend."""
         from datetime import datetime as dt, timezone, timedelta
@@ -237,6 +247,23 @@ This is test content.
         with pytest.raises(ValueError, match='Not a git repository'):
             GitBackend(repo_path=non_git_dir)
 
+    def test_generic_backend_is_abstract(self):
+        """Test GenericBackend must be built through a subclass."""
+        from pulseox.generic_backend import (
+            GenericBackend, GitGenericBackend, make_backend)
+        import pydantic
+        import pytest
+
+        with pytest.raises(TypeError):
+            GenericBackend(owner=None, repo=f'file://{self._repo_path}',
+                           backend_type='git')
+        backend = make_backend(None, f'file://{self._repo_path}',
+                               auto_push=False)
+        assert isinstance(backend, GitGenericBackend)
+        with pytest.raises(pydantic.ValidationError):
+            GitGenericBackend(owner=None, repo=f'file://{self._repo_path}',
+                              backend_type='github')
+
     def test_write_multiple_files(self):
         """Test writing multiple files in one commit."""
         from pulseox.git import GitBackend
@@ -257,3 +284,70 @@ This is test content.
             assert os.path.exists(file_path)
             content = Path(file_path).read_text()
             assert content == expected_content
+
+    def test_apply_updates(self):
+        """Test writing to several repositories at once."""
+        from pulseox.git import GitBackend, apply_updates
+
+        other_path = os.path.join(self._tmpdir, 'other_repo')
+        subprocess.run(['git', 'clone', '-q', self._repo_path, other_path],
+                       check=True)
+        for key, value in [('user.email', 'test@example.com'),
+                           ('user.name', 'Test User'),
+                           ('commit.gpgsign', 'false')]:
+            subprocess.run(['git', 'config', key, value], cwd=other_path,
+                           check=True)
+        first, other = [GitBackend(repo_path=path, auto_push=False)
+                        for path in (self._repo_path, other_path)]
+        apply_updates([
+            (first, [('apply.md', 'first 1')], 'Apply first 1'),
+            (other, [('apply.md', 'other')], 'Apply other'),
+            (first, [('apply.md', 'first 2')], 'Apply first 2'),
+        ])
+        for path, rev, expected in [
+                (self._repo_path, 'HEAD', 'first 2'),
+                (self._repo_path, 'HEAD~1', 'first 1'),
+                (other_path, 'HEAD', 'other')]:
+            assert subprocess.run(
+                ['git', 'show', f'{rev}:apply.md'], cwd=path, check=True,
+                capture_output=True, text=True).stdout == expected
+
+    def test_get_file_content_sees_changes(self):
+        """Test reads always pick up rewritten files."""
+        from pulseox.git import GitBackend
+
+        backend = GitBackend(repo_path=self._repo_path, auto_push=False)
+        backend.write_tree([('cached.md', 'first')], 'Add cached file')
+        assert backend.get_file_content('cached.md') == 'first'
+        assert backend.get_file_content('cached.md') == 'first'
+        backend.write_tree([('cached.md', 'second version')],
+                           'Update cached file')
+        assert backend.get_file_content('cached.md') == 'second version'
+        # A same size rewrite is seen right away
+        Path(self._repo_path, 'cached.md').write_text('second VERSION')
+        assert backend.get_file_content('cached.md') == 'second VERSION'
+
+    def test_file_mtime_sees_outside_commits(self):
+        """Test cached commit times are rebuilt when HEAD moves."""
+        from pulseox.git import GitBackend
+
+        backend = GitBackend(repo_path=self._repo_path, auto_push=False)
+        backend.write_tree([('mtime.md', 'first')], 'Add mtime file')
+        first = backend.get_file_mtime('mtime.md')
+        assert first.year > 2001
+        # Commit from another process with a known author date
+        Path(self._repo_path, 'mtime.md').write_text('outside')
+        subprocess.run(['git', 'add', 'mtime.md'], cwd=self._repo_path,
+                       check=True, capture_output=True)
+        subprocess.run(
+            ['git', 'commit', '-m', 'Outside commit',
+             '--date', '2001-02-03T04:05:06+00:00'],
+            cwd=self._repo_path, check=True, capture_output=True)
+        assert backend.get_file_mtime('mtime.md') == (
+            datetime.datetime(2001, 2, 3, 4, 5, 6,
+                              tzinfo=datetime.timezone.utc))
+        # Many paths take one walk limited to those paths
+        times = backend.get_file_mtimes(['mtime.md', 'README.md', 'nope.md'])
+        assert times['mtime.md'].year == 2001 and times['nope.md'] is None
+        assert set(backend._mtime_cache) == {'mtime.md', 'README.md',
+                                             'nope.md'}
@@ -2,19 +2,31 @@
 """
 
 
+import asyncio
 import datetime
+import io
+import json
 import os
 import random
 import re
 import tempfile
 import time
 import shutil
+import sqlite3
+from unittest.mock import patch
 
+import pytest
+import requests
 from click.testing import CliRunner
 
-from pulseox.specs import PulseOxSpec
+import pulseox.github
+import pulseox.github_http
+import pulseox.github_tree
+from pulseox.specs import PulseOxSpec, ValidationError
 from pulseox.client import PulseOxClient
 from pulseox.dashboard import PulseOxDashboard
+from pulseox.github import (GitHubBackend, PersistentShaCache,
+                            download_github_file, load_json)
 from pulseox.ui.cli import cli as po_cli
 from pulseox.test_tools.mock_github_server import MockGitHubServer
 from pulseox.test_tools import patches
@@ -147,6 +159,370 @@ class TestGitHubWithPyClient(GenericGitHubTester):
     def test_lookup(self):
         return self.check_lookup()
 
+    def test_repeat_posts_track_sha(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        first, second = [PulseOxClient(token=self._tokens[0])
+                         for _ in range(2)]
+        # Last post by `first` uses a SHA made stale by `second`
+        for num, client in enumerate((first, first, second, first)):
+            resp = client.post(path_to_file='sha_example.md',
+                               content=f'sha update {num}', **rinfo)
+            assert resp.status_code in (200, 201)
+
+    def test_persistent_sha_cache(self, monkeypatch):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        cache_path = os.path.join(self._tmpdir, 'cache', 'sha.sqlite')
+        monkeypatch.setenv('PULSEOX_SHA_CACHE', cache_path)
+        for num in range(2):  # new client each time like a cron job
+            client = PulseOxClient(token=self._tokens[0])
+            resp = client.post(path_to_file='cron_example.md',
+                               content=f'cron update {num}', **rinfo)
+            assert resp.status_code in (200, 201)
+            url = resp.request.url
+            with PersistentShaCache(cache_path) as cache:
+                assert cache.get(url) == resp.json()['content']['sha']
+
+    def test_persistent_sha_cache_closes_connections(self):
+        connections = []
+        real_connect = pulseox.github.sqlite3.connect
+
+        def connect(*args, **kwargs):
+            connections.append(real_connect(*args, **kwargs))
+            return connections[-1]
+
+        cache_path = os.path.join(self._tmpdir, 'cache', 'closing.sqlite')
+        with patch.object(pulseox.github.sqlite3, 'connect', connect):
+            with PersistentShaCache(cache_path) as cache:
+                # Lookups do not create the database
+                assert cache.get('url') is None and cache.pop('url') is None
+                assert not connections and not os.path.exists(cache_path)
+                cache['url'] = 'abc'
+                assert cache.pop('url') == 'abc' and cache.get('url') is None
+        assert len(connections) == 1  # one connection reused
+        with pytest.raises(sqlite3.ProgrammingError):  # closed
+            connections[0].execute('SELECT 1')
+
+    def test_post_many(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        client = PulseOxClient(token=self._tokens[0])
+        resp = client.post_many(files=[
+            ('many_1.md', 'first of many'),
+            ('many_2.md', 'second of many', 'BAD', 'broken')], **rinfo)
+        assert resp.status_code == 200
+        for name, report in [('many_1.md', 'GOOD'), ('many_2.md', 'BAD')]:
+            spec = PulseOxSpec(path=name, schedule=datetime.timedelta(
+                hours=1), **rinfo)
+            spec.update(token=self._tokens[0],
+                        base_url=os.environ['DEFAULT_PULSEOX_URL'])
+            assert spec.report == report, f'{name=}: {spec=}'
+        for bad_item in [('only_path.md',), ('a.md', 'x', 'GOOD', '', '')]:
+            with pytest.raises(ValidationError, match='must be'):
+                client.post_many(files=[bad_item], **rinfo)
+
+    def test_content_cache(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        client = PulseOxClient(token=self._tokens[0])
+        spec = PulseOxSpec(path='cached.md', schedule=datetime.timedelta(
+            hours=1), **rinfo)
+        with patch('pulseox.github_http.CONTENT_CACHE_TTL', 300):
+            for report in ['GOOD', 'BAD']:  # writes drop cached lookups
+                client.post(path_to_file='cached.md', content=report,
+                            report=report, **rinfo)
+                for _ in range(2):
+                    spec.update(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+                    assert spec.report == report
+            assert any(key[0].endswith('/cached.md')
+                       for key in pulseox.github_http._content_cache)
+            assert not any(self._tokens[0] in key  # keyed by token hash
+                           for key in pulseox.github_http._content_cache)
+
+    def test_conditional_lookup(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        client = PulseOxClient(token=self._tokens[0])
+        client.post(path_to_file='etag.md', content=str(time.time()),
+                    report='GOOD', **rinfo)
+        url = (os.environ['DEFAULT_PULSEOX_URL']
+               + '/repos/testowner/testrepo/contents/etag.md')
+        first = pulseox.github.cached_get(url, self._tokens[0])
+        assert first.status_code == 200
+        assert pulseox.github.cached_get(url, self._tokens[0]) is first
+
+        # Repeat spec lookups reuse what was parsed from the response
+        spec = PulseOxSpec(path='etag.md', schedule=datetime.timedelta(
+            hours=1), **rinfo)
+        spec.update(token=self._tokens[0],
+                    base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        with patch.object(PulseOxSpec, '_parse_metadata') as parse:
+            spec.update(token=self._tokens[0],
+                        base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        assert parse.call_count == 0 and spec.report == 'GOOD'
+
+    def test_update_specs(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        client = PulseOxClient(token=self._tokens[0])
+        specs = []
+        for i, report in enumerate(['GOOD', 'BAD', 'GOOD']):
+            path = f'many_specs_{i}.md'
+            client.post(path_to_file=path, content=f'{report} {time.time()}',
+                        report=report, **rinfo)
+            specs.append(PulseOxSpec(path=path, schedule=datetime.timedelta(
+                hours=1), **rinfo))
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        backend.update_specs(specs, max_workers=2)
+        assert [s.report for s in specs] == ['GOOD', 'BAD', 'GOOD']
+
+        for spec in specs:
+            spec.report = 'NOT_REPORTED'
+        PulseOxSpec.update_many(specs, token=self._tokens[0],
+                                base_url=backend.base_url,
+                                use_graphql=False, max_workers=2)
+        assert [s.report for s in specs] == ['GOOD', 'BAD', 'GOOD']
+
+    def test_update_many_with_graphql(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        client = PulseOxClient(token=self._tokens[0])
+        specs = []
+        for i, report in enumerate(['GOOD', 'BAD', None]):
+            path = f'graphql_specs_{i}.md'
+            if report:  # the last spec's file is missing
+                client.post(path_to_file=path, report=report,
+                            content=f'{report} {time.time()}', **rinfo)
+            specs.append(PulseOxSpec(path=path, schedule=datetime.timedelta(
+                hours=1), **rinfo))
+        with patch.object(pulseox.github, 'update_github_spec',
+                          side_effect=pulseox.github.update_github_spec
+                          ) as rest:
+            PulseOxSpec.update_many(specs, token=self._tokens[0],
+                                    base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        assert [s.report for s in specs] == ['GOOD', 'BAD', 'NOT_REPORTED']
+        assert specs[0].updated is not None
+        # Only the missing file falls back to REST (to get the usual note)
+        assert [c.args[0] for c in rest.call_args_list] == [specs[2]]
+        assert '404' in specs[2].note
+
+    def test_dashboard_with_graphql(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        dashboard = PulseOxDashboard(
+            token=self._tokens[0], spec_list=self.make_test_spec_list(rinfo),
+            use_graphql=True, **rinfo)
+        with patch.object(PulseOxSpec, 'update_many',
+                          side_effect=PulseOxSpec.update_many) as many:
+            dashboard.compute_summary()
+        assert many.call_count == 1
+        assert many.call_args.kwargs['use_graphql']
+        assert dashboard.summary.text
+
+    def test_write_file_skips_unchanged(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        args = ('testowner', 'testrepo', 'unchanged content', 'unchanged.md')
+        backend.write_github_file(*args)
+        assert backend._latest_response.status_code == 201
+        backend.write_github_file(*args)
+        assert backend._latest_response is None
+
+    def test_dump_json(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        dashboard = PulseOxDashboard(
+            token=self._tokens[0], spec_list=self.make_test_spec_list(rinfo),
+            **rinfo)
+        dashboard.compute_summary()
+        with patch('pulseox.dashboard.orjson', None):
+            plain = dashboard.dump_json()
+        assert json.loads(dashboard.dump_json()) == json.loads(plain)
+        assert PulseOxDashboard.model_validate_json(
+            dashboard.dump_json()).summary == dashboard.summary
+
+    def test_stream_github_file(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        content = f'streamed {time.time()}\n'.encode() * 1000
+        backend.write_github_file('testowner', 'testrepo', content,
+                                  'streamed.md')
+        buffer = io.BytesIO()
+        written = pulseox.github.stream_github_file(
+            self._tokens[0], 'testowner', 'testrepo', 'streamed.md', buffer,
+            base_url=backend.base_url, chunk_size=4096)
+        assert written == len(content) and buffer.getvalue() == content
+
+    def test_load_json_parses_cached_response_once(self):
+        response = requests.Response()
+        response._content = b'{"sha": "abc"}'
+        first = load_json(response)
+        response._content = b'{"sha": "changed"}'
+        assert load_json(response) is first
+        assert first == {'sha': 'abc'}
+        assert not hasattr(response, '_pulseox_json')
+
+    def test_write_summary_skip_unchanged(self):
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        dashboard = PulseOxDashboard(
+            token=self._tokens[0], spec_list=self.make_test_spec_list(rinfo),
+            **rinfo)
+        kwargs = {'path_to_summary': 'skip_summary.md',
+                  'skip_unchanged': True}
+        # Compute twice so the later polls see the same (empty) changes
+        dashboard.compute_summary().compute_summary()
+        dashboard.write_summary(**kwargs)
+        assert dashboard._latest_response is not None
+        dashboard.write_summary(**kwargs)
+        assert dashboard._latest_response is None
+        # A later poll with the same statuses is skipped even though the
+        # timestamps in the recomputed summary differ
+        dashboard.compute_summary()
+        with patch.object(PulseOxDashboard, 'dump_json') as dump:
+            dashboard.write_summary(**kwargs)
+        assert dashboard._latest_response is None and dump.call_count == 0
+        # Extra text changes are still written
+        dashboard.compute_summary(extra_text='\nextra')
+        dashboard.write_summary(**kwargs)
+        assert dashboard._latest_response is not None
+        dashboard.write_summary(force_refresh=True, **kwargs)
+        assert dashboard._latest_response is not None
+
+    def test_update_file_skips_lookup_when_absent(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        path = f'absent_{time.time()}.md'
+        url = f'{backend.base_url}/repos/testowner/testrepo/contents/{path}'
+        assert backend._fetch_sha(url) is None  # records the 404
+        with patch.object(GitHubBackend, '_fetch_sha', autospec=True,
+                          side_effect=GitHubBackend._fetch_sha) as fetch:
+            response = backend.update_file('testowner', 'testrepo', path,
+                                           'created')
+        assert response.status_code == 201 and fetch.call_count == 0
+        assert not backend._absent_urls
+
+        # A file wrongly thought absent falls back to looking up its SHA
+        backend._known_sha.clear()
+        backend._absent_urls.add(url)
+        response = backend.update_file('testowner', 'testrepo', path,
+                                       'updated')
+        assert response.status_code == 200
+        assert download_github_file(
+            self._tokens[0], 'testowner', 'testrepo', path,
+            base_url=backend.base_url) == b'updated'
+
+    def test_write_file_uses_known_sha(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        stamp = str(time.time())
+        backend.write_github_file('testowner', 'testrepo', stamp, 'known.md')
+        with patch.object(GitHubBackend, '_fetch_sha', autospec=True,
+                          side_effect=GitHubBackend._fetch_sha) as fetch:
+            backend.write_github_file('testowner', 'testrepo',
+                                      stamp + ' again', 'known.md')
+            assert backend._latest_response.status_code == 200
+            assert fetch.call_count == 0
+            backend._known_sha[next(iter(backend._known_sha))] = 'stale'
+            backend.write_github_file('testowner', 'testrepo',
+                                      stamp + ' third', 'known.md')
+            assert backend._latest_response.status_code == 200
+            assert fetch.call_count == 1
+
+    def test_write_tree_skips_unchanged(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        files = [('same_1.md', 'same content'), ('same_2.md', 'same too')]
+        backend.write_github_tree('testowner', 'testrepo', files)
+        first = backend._latest_response
+        assert first.request.method == 'PATCH'
+        backend.write_github_tree('testowner', 'testrepo', files)
+        assert backend._latest_response.request.method == 'GET'
+        # The unmoved branch's tree entries are reused without a lookup
+        with patch.object(backend, '_request',
+                          side_effect=backend._request) as request:
+            backend.write_github_tree('testowner', 'testrepo', files)
+        assert backend._latest_response is None
+        assert not any('/git/trees/' in c.args[1]
+                       for c in request.call_args_list)
+
+    def test_write_tree_single_change_uses_contents(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        stamp = str(time.time())
+        backend.write_github_tree('testowner', 'testrepo', [
+            ('single_1.md', 'kept'), ('single_2.md', stamp)])
+        assert backend._latest_response.request.method == 'PATCH'
+        backend.write_github_tree('testowner', 'testrepo', [
+            ('single_1.md', 'kept'), ('single_2.md', stamp + ' changed')])
+        assert backend._latest_response.request.method == 'PUT'
+        assert download_github_file(
+            self._tokens[0], 'testowner', 'testrepo', 'single_2.md',
+            base_url=backend.base_url) == (stamp + ' changed').encode()
+
+    def test_write_tree_reuses_branch_lookup(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        with patch.object(GitHubBackend, '_fetch_commit_tree', autospec=True,
+                          side_effect=GitHubBackend._fetch_commit_tree) as f:
+            for i in range(3):
+                backend.write_github_tree('testowner', 'testrepo', [
+                    ('reuse.md', f'reuse content {i}')])
+        # Only the first head needs its tree looked up; later heads are
+        # commits this backend made so their trees are already known
+        assert f.call_count == 1
+        assert any(url.endswith('/git/ref/heads/main')
+                   for url in backend._etag_cache)
+
+    def test_write_tree_with_large_files(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        files = [('small.md', 'small file'),
+                 ('large_1.md', 'a' * 64), ('large_2.md', 'b' * 64)]
+        with patch('pulseox.github_tree.MAX_INLINE_CONTENT', 32):
+            backend.write_github_tree('testowner', 'testrepo', files)
+        for path, content in files:
+            assert download_github_file(
+                self._tokens[0], 'testowner', 'testrepo', path,
+                base_url=backend.base_url) == content.encode()
+
+    def test_write_tree_with_bytes(self):
+        backend = GitHubBackend(token=self._tokens[0],
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        files = [('small_bytes.md', 'caf\u00e9'.encode()),
+                 ('large_bytes.md', 'caf\u00e9 '.encode() * 8)]
+        with patch('pulseox.github_tree.MAX_INLINE_CONTENT', 32):
+            backend.write_github_tree('testowner', 'testrepo', files)
+        for path, content in files:
+            assert download_github_file(
+                self._tokens[0], 'testowner', 'testrepo', path,
+                base_url=backend.base_url) == content
+
+    def test_write_tree_with_graphql(self):
+        backend = GitHubBackend(token=self._tokens[0], use_graphql=True,
+                                base_url=os.environ['DEFAULT_PULSEOX_URL'])
+        backend.write_github_tree('testowner', 'testrepo', [
+            ('graphql_1.md', 'first graphql file'),
+            ('graphql_2.md', 'second graphql file')])
+        assert backend._latest_response.json()['data']
+        for num, word in [(1, 'first'), (2, 'second')]:
+            assert download_github_file(
+                self._tokens[0], 'testowner', 'testrepo',
+                f'graphql_{num}.md', base_url=backend.base_url
+            ) == f'{word} graphql file'.encode()
+
+    def test_apost(self):
+        async def _post():
+            async with PulseOxClient(token=self._tokens[0]) as client:
+                return await client.apost(
+                    owner='testowner', repo='testrepo',
+                    path_to_file='async_example.md', content='async update')
+
+        resp = asyncio.run(_post())
+        assert resp.status_code in (200, 201)
+
+    def test_post_concurrently(self):
+        client = PulseOxClient(token=self._tokens[0])
+        rinfo = {'owner': 'testowner', 'repo': 'testrepo'}
+        responses = client.post_concurrently([
+            dict(path_to_file=f'concurrent_{num}.md',
+                 content=f'concurrent update {num}', **rinfo)
+            for num in range(3)])
+        assert [r.status_code for r in responses] == [201] * 3
+
 
 class TestGitHubWithCLI(GenericGitHubTester):
     """Do tests on mock GitHub with cli.
@@ -2,11 +2,12 @@
 """
 
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 import pytest
 import pydantic
 
-from pulseox.specs import PulseOxSpec
+from pulseox.specs import PulseOxSpec, next_cron_run, parse_cron
 
 
 def make_spec(**kwargs):
@@ -86,6 +87,34 @@ class TestGracePeriodCron:
         # Well beyond next run plus grace period
         assert not spec.is_within_schedule(updated_str=ago(minutes=20))
 
+    def test_cron_with_explicit_now(self):
+        spec = make_spec(schedule='0 * * * *',
+                         grace_period=timedelta(minutes=5))
+        updated = '2024-01-02T03:30:00+00:00'
+        for minute, expected in [(0, True), (5, True), (6, False)]:
+            now = datetime(2024, 1, 2, 4, minute, tzinfo=timezone.utc)
+            assert spec.is_within_schedule(
+                updated_str=updated, now=now) is expected
+
+    def test_next_run_depends_on_timezone(self):
+        # Same instant in two zones must not share a cached next run
+        start_utc = datetime(2024, 1, 2, 3, 30, tzinfo=timezone.utc)
+        start_est = start_utc.astimezone(timezone(timedelta(hours=-5)))
+        assert start_utc == start_est
+        assert next_cron_run('0 9 * * *', start_utc) == datetime(
+            2024, 1, 2, 9, 0, tzinfo=timezone.utc)
+        assert next_cron_run('0 9 * * *', start_est) == datetime(
+            2024, 1, 2, 14, 0, tzinfo=timezone.utc)
+
+    def test_invalid_cron_rejected(self):
+        with pytest.raises(pydantic.ValidationError):
+            make_spec(schedule='61 * * * *')
+        # croniter raises KeyError for some malformed fields
+        parse_cron.cache_clear()
+        with patch('pulseox.specs.croniter', side_effect=KeyError('L')):
+            with pytest.raises(pydantic.ValidationError, match='Invalid'):
+                make_spec(schedule='1 2 3 4 5')
+
 
 class TestGracePeriodValidationAndSerialization:
 
@@ -0,0 +1,103 @@
+"""Tests for GitHub rate limit handling.
+"""
+
+import time
+
+import requests
+
+from pulseox.github import GitHubBackend
+from pulseox.github_http import make_session, rate_limit_wait
+
+
+def make_response(status_code, **headers):
+    """Helper to build a requests.Response with given status/headers."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    return response
+
+
+class FakeSession:
+    """Session returning canned responses and recording requests."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+        self.headers = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        self.headers.append(kwargs.get('headers'))
+        return self.responses.pop(0)
+
+
+class TestRateLimitWait:
+
+    def test_not_rate_limited(self):
+        assert rate_limit_wait(make_response(200)) is None
+        assert rate_limit_wait(make_response(404)) is None
+
+    def test_forbidden_without_rate_limit_is_not_retried(self):
+        assert rate_limit_wait(make_response(403)) is None
+
+    def test_retry_after(self):
+        assert rate_limit_wait(make_response(
+            403, **{'Retry-After': '7'})) == 7
+
+    def test_primary_limit_uses_reset(self):
+        reset = str(int(time.time()) + 30)
+        wait = rate_limit_wait(make_response(
+            403, **{'X-RateLimit-Remaining': '0',
+                    'X-RateLimit-Reset': reset}))
+        assert 25 < wait <= 30
+
+    def test_too_many_requests_uses_default(self):
+        assert rate_limit_wait(make_response(429), default=2) == 2
+
+
+class TestBackendRetries:
+
+    def test_session_retries_server_errors_for_reads(self):
+        retry = make_session().get_adapter('https://x').max_retries
+        assert 503 in retry.status_forcelist
+        assert retry.allowed_methods == {'GET', 'HEAD'}
+        for method in ('PUT', 'POST', 'PATCH'):  # may already be applied
+            assert not retry.is_retry(method, 502)
+            assert not retry._is_method_retryable(method)
+
+    def test_retries_after_secondary_limit(self):
+        session = FakeSession([
+            make_response(403, **{'Retry-After': '0'}),
+            make_response(200)])
+        backend = GitHubBackend(token='x', session=session)
+        response = backend._request('GET', 'http://example.com')
+        assert response.status_code == 200
+        assert len(session.calls) == 2
+
+    def test_long_wait_is_not_attempted(self):
+        session = FakeSession([make_response(403, **{'Retry-After': '600'})])
+        backend = GitHubBackend(token='x', session=session,
+                                max_rate_limit_wait=5)
+        response = backend._request('GET', 'http://example.com')
+        assert response.status_code == 403
+        assert len(session.calls) == 1
+
+    def test_rotates_token_pool(self):
+        session = FakeSession([make_response(200) for _ in range(3)])
+        backend = GitHubBackend(token='a', tokens=['b'], session=session)
+        for _ in range(3):
+            backend._request('GET', 'http://example.com')
+        assert [h['Authorization'] for h in session.headers] == [
+            'token a', 'token b', 'token a']
+
+    def test_skips_exhausted_token(self):
+        reset = str(int(time.time()) + 600)
+        session = FakeSession([
+            make_response(403, **{'X-RateLimit-Remaining': '0',
+                                  'X-RateLimit-Reset': reset}),
+            make_response(200), make_response(200)])
+        backend = GitHubBackend(token='a', tokens=['b'], session=session)
+        assert backend._request('GET', 'http://x').status_code == 200
+        assert backend._request('GET', 'http://x').status_code == 200
+        assert [h['Authorization'] for h in session.headers] == [
+            'token a', 'token b', 'token b']